@@ -7,9 +7,12 @@ import uuid
 
 from src.questions import questions
 from src.session import InsuranceChatbotSession
+from src.nhtsa_api import extract_vins
+from src.quote_pool import get_quote_pool
 from src.database import (
     init_database, create_session, save_message, 
-    update_session_data, complete_session
+    update_session_data, complete_session, enable_write_behind,
+    record_turn_event, start_idle_sweeper
 )
 
 # Load environment variables
@@ -37,6 +40,18 @@ if not api_key.startswith("sk-"):
 # Initialize database
 init_database()
 
+# Optionally commit chat writes from a background thread
+if os.getenv("DB_WRITE_BEHIND", "").lower() in ("1", "true", "yes"):
+    enable_write_behind()
+
+# Mark sessions with no activity for DB_IDLE_SWEEP_MINUTES as abandoned (0 disables)
+idle_minutes = int(os.getenv("DB_IDLE_SWEEP_MINUTES", "30"))
+if idle_minutes > 0:
+    start_idle_sweeper(idle_minutes)
+
+# Prefetch quotes for frustrated users in the background (no-op once warm)
+get_quote_pool().refill_async()
+
 # Page config
 st.set_page_config(
     page_title="Insurance Survey Chatbot",
@@ -108,6 +123,23 @@ with st.form(key='message_form', clear_on_submit=True):
     user_input = st.text_input("Your answer:", key="user_input", label_visibility="collapsed")
     submit_button = st.form_submit_button("Send")
 
+# Fleet customers can upload a list of VINs instead of typing them
+next_question = st.session_state.session.get_next_question()
+if next_question and next_question['id'] == 'vehicle_identifier' and not (submit_button and user_input):
+    # Keyed by history length so the uploader clears once the list has been sent
+    vin_file = st.file_uploader(
+        "Or upload a list of VINs (.txt or .csv)",
+        type=["txt", "csv"],
+        key=f"vin_upload_{len(st.session_state.chat_history)}"
+    )
+    if vin_file is not None:
+        uploaded_vins = extract_vins(vin_file.getvalue().decode("utf-8", errors="ignore"))
+        if uploaded_vins:
+            user_input = ", ".join(uploaded_vins)
+            submit_button = True
+        else:
+            st.warning("No VINs found in that file.")
+
 if submit_button and user_input:
     # Add user message to chat
     st.session_state.chat_history.append({
@@ -122,6 +154,10 @@ if submit_button and user_input:
     with st.spinner("🤖 Thinking..."):
         # Process response
         response = st.session_state.session.process_response(user_input)
+    
+    # Record funnel analytics for this turn
+    if st.session_state.session.last_turn:
+        record_turn_event(st.session_state.session_id, st.session_state.session.last_turn)
         
     # Handle response - check for both 'message' and 'error' keys
     bot_message = response.get('message') or response.get('error', 'Sorry, something went wrong.')
@@ -0,0 +1,76 @@
+"""
+Cost per message of the frustration matcher as the lexicon grows.
+
+Usage:
+    python -m benchmarks.frustration_matcher
+
+Compares the compiled trie regex (FrustrationMatcher) with the original
+approach of one substring scan per keyword, for lexicons from the default
+size up to tens of thousands of phrases.
+"""
+import random
+import string
+import timeit
+
+from src.frustration import FRUSTRATION_LEXICON, FrustrationMatcher
+
+MESSAGES = [
+    "2020 Honda Civic",
+    "yes",
+    "I use it to commute to work about 25 miles each way",
+    "This is helpful, thanks! My email is jane.doe@example.com",
+    "I waited at the bus stop for twenty minutes this morning",
+    "this is not working, I want to speak to a human",
+    "Commercial",
+    "It's mostly for business, around 18,000 miles a year",
+]
+
+LEXICON_SIZES = [len(FRUSTRATION_LEXICON), 200, 2000, 20000]
+NUMBER = 2000
+
+
+def synthetic_lexicon(size, seed=0):
+    """The default lexicon padded with random one- to three-word phrases"""
+    rng = random.Random(seed)
+    lexicon = dict(FRUSTRATION_LEXICON)
+    while len(lexicon) < size:
+        words = [
+            "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        lexicon[" ".join(words)] = round(rng.uniform(0.2, 1.0), 1)
+    return lexicon
+
+
+def naive_scan(keywords, text):
+    """The pre-matcher approach: one substring scan per keyword"""
+    text = text.lower()
+    return [keyword for keyword in keywords if keyword in text]
+
+
+def main():
+    print(f"{'phrases':>8} {'compile ms':>11} {'regex us/msg':>13} {'naive us/msg':>13}")
+
+    for size in LEXICON_SIZES:
+        lexicon = synthetic_lexicon(size)
+        keywords = list(lexicon)
+
+        compile_seconds = timeit.timeit(lambda: FrustrationMatcher(lexicon), number=1)
+        matcher = FrustrationMatcher(lexicon)
+
+        regex_seconds = timeit.timeit(
+            lambda: [matcher.score(message) for message in MESSAGES], number=NUMBER
+        )
+        naive_seconds = timeit.timeit(
+            lambda: [naive_scan(keywords, message) for message in MESSAGES], number=NUMBER
+        )
+
+        per_message = NUMBER * len(MESSAGES)
+        print(
+            f"{size:>8} {compile_seconds * 1000:>11.1f} "
+            f"{regex_seconds / per_message * 1e6:>13.2f} {naive_seconds / per_message * 1e6:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import streamlit as st
+from src.database import init_database, get_funnel_rollups, get_model_tier_rollups, get_dropoff_by_question
+from src.local_validators import get_local_validation_stats
+from src.validators import get_llm_routing_stats, get_llm_parse_stats
+from src.questions import questions
+
+# Initialize database if it doesn't exist
+init_database()
+
+st.set_page_config(page_title="Funnel Analytics", page_icon="📈", layout="wide")
+
+st.title("📈 Funnel Analytics")
+st.markdown("Where users drop off and which questions need the most retries")
+
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+# Rollups are maintained on write, so this is one small read per question
+funnel = get_funnel_rollups()
+
+if not funnel:
+    st.info("No turns recorded yet.")
+else:
+    first_reached = funnel.get(questions[0]['id'], {}).get('sessions_reached', 0)
+
+    # Questions sit on different branches (commuting vs. mileage, the vehicle
+    # loop), so drop-off comes from where abandoned sessions actually stopped
+    # rather than from the difference to the previous question in the list
+    dropoff = get_dropoff_by_question()
+
+    rows = []
+    for question in questions:
+        metrics = funnel.get(question['id'])
+        if not metrics:
+            continue
+
+        reached = metrics['sessions_reached']
+        median = metrics['median_seconds']
+
+        rows.append({
+            "Question": question['id'],
+            "Sessions Reached": reached,
+            "% of Starts": f"{reached / first_reached:.0%}" if first_reached else "-",
+            "Abandoned Here": dropoff.get(question['id'], 0),
+            "Turns": metrics['turns'],
+            "Retry Rate": f"{metrics['retry_rate']:.0%}",
+            "Skip Rate": f"{metrics['skip_rate']:.0%}",
+            "Frustration Rate": f"{metrics['frustration_rate']:.0%}",
+            "Median Time": f"≤ {median}s" if median else "> 10m",
+            "Mean Time": f"{metrics['mean_seconds']:.1f}s",
+        })
+
+    st.subheader("Question Funnel")
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    st.subheader("Sessions Reaching Each Question")
+    st.bar_chart(rows, x="Question", y="Sessions Reached")
+
+    # A skip ends the retrying rather than adding a retry, so only re-asks count
+    st.subheader("Retries per Question")
+    st.bar_chart(
+        [
+            {"Question": question_id, "Retries": metrics['reask']}
+            for question_id, metrics in funnel.items()
+        ],
+        x="Question",
+        y="Retries"
+    )
+
+    st.caption(
+        "Vehicle questions are counted once per session; repeated vehicles add turns, not sessions. "
+        "Abandoned Here counts sessions the idle sweeper marked abandoned whose last turn was on that question. "
+        "Median time is the upper bound of the histogram bucket containing the median."
+    )
+
+# Counters live in this server process, so they reset on restart
+local_stats = get_local_validation_stats()
+if local_stats['turns']:
+    st.subheader("Local Validation Fast Path")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Validated Turns", local_stats['turns'])
+    col2.metric("Resolved Without LLM", local_stats['resolved_locally'])
+    col3.metric("Local Rate", f"{local_stats['local_rate']:.0%}")
+
+    st.dataframe(
+        [
+            {"Question": question_id, "Accepted": counters['accepted'],
+             "Rejected": counters['rejected'], "Sent to LLM": counters['llm']}
+            for question_id, counters in local_stats['by_question'].items()
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption("Since the app server started.")
+
+MODEL_TIER_COLUMNS = ["local", "cache", "small", "large"]
+
+tier_rollups = get_model_tier_rollups()
+if tier_rollups:
+    st.subheader("Model Tiers")
+    st.markdown("Which validator answered each turn; small-tier answers that were invalid or unsure were escalated to the large model")
+
+    order = {question['id']: position for position, question in enumerate(questions)}
+    st.dataframe(
+        [
+            {"Question": question_id,
+             **{tier.title(): tiers.get(tier, {}).get('turns', 0) for tier in MODEL_TIER_COLUMNS}}
+            for question_id, tiers in sorted(tier_rollups.items(), key=lambda item: order.get(item[0], len(order)))
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    routing = get_llm_routing_stats()
+    parse_stats = get_llm_parse_stats()
+    if routing:
+        rows = []
+        for tier, stats in routing.items():
+            parsed = parse_stats.get(stats['model'], {})
+            rows.append({
+                "Tier": tier, "Model": stats['model'], "Calls": stats['calls'],
+                "Mean Latency (ms)": round(stats['mean_ms']), "Escalation Rate": f"{stats['escalation_rate']:.0%}",
+                "Unusable Replies": parsed.get('parse_failures', 0) + parsed.get('refusals', 0),
+                "Parse Failure Rate": f"{parsed.get('failure_rate', 0.0):.1%}"
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption(
+            "LLM call latency, escalations and unusable replies (invalid JSON or refusals) "
+            "since the app server started."
+        )
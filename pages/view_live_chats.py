@@ -1,5 +1,41 @@
+import time
 import streamlit as st
-from src.database import init_database, get_all_sessions, get_session_details, get_live_chat_transcript
+from src.database import (
+    init_database, get_sessions_page, get_session_stats, get_session_details,
+    get_transcript_page, get_messages_after, get_feed_position,
+    get_data_version, search_messages, get_live_chat_transcript, format_timestamp
+)
+
+FEED_BATCH_SIZE = 500
+
+
+def load_transcript(session_id):
+    """Fetch a session's full transcript and remember its last message id"""
+    cached = {'last_id': 0, 'messages': []}
+
+    while True:
+        rows = get_transcript_page(session_id, cached['last_id'], FEED_BATCH_SIZE)
+        for message_id, timestamp, role, content in rows:
+            cached['messages'].append((timestamp, role, content))
+            cached['last_id'] = message_id
+
+        if len(rows) < FEED_BATCH_SIZE:
+            return cached
+
+
+def apply_new_messages(transcripts, position):
+    """Append messages written since position to cached transcripts; returns the new feed position"""
+    while True:
+        rows, position = get_messages_after(position, FEED_BATCH_SIZE)
+        for message_id, session_id, timestamp, role, content in rows:
+            cached = transcripts.get(session_id)
+            if cached and message_id > cached['last_id']:
+                cached['messages'].append((timestamp, role, content))
+                cached['last_id'] = message_id
+
+        if len(rows) < FEED_BATCH_SIZE:
+            return position
+
 
 # Initialize database if it doesn't exist
 init_database()
@@ -9,72 +45,155 @@ st.set_page_config(page_title="Live Chat Monitor", page_icon="📊", layout="wid
 st.title("📊 Live Chat Monitor")
 st.markdown("View all chat sessions and their real-time transcripts")
 
+state = st.session_state
+if 'monitor_transcripts' not in state:
+    state.monitor_transcripts = {}
+    state.monitor_feed_position = get_feed_position()
+    state.monitor_version = None
+    state.monitor_page = None
+
 # Auto-refresh
-if st.button("🔄 Refresh"):
-    st.rerun()
+col1, col2, col3 = st.columns([1, 1, 2])
+if col1.button("🔄 Refresh"):
+    state.monitor_version = None
+auto_refresh = col2.toggle("Auto-refresh", value=True)
+refresh_seconds = col3.select_slider("Interval (seconds)", options=[2, 5, 10, 30, 60], value=5)
 
-sessions = get_all_sessions()
+# Only touch the database when something has been committed since the last run
+version = get_data_version()
+data_changed = version != state.monitor_version
+if data_changed:
+    state.monitor_version = version
+    state.monitor_stats = get_session_stats()
+    state.monitor_feed_position = apply_new_messages(
+        state.monitor_transcripts, state.monitor_feed_position
+    )
 
-if not sessions:
+stats = state.monitor_stats
+
+if not stats['total']:
     st.info("No chat sessions yet.")
 else:
     # Summary stats
-    col1, col2, col3 = st.columns(3)
-    
-    total_sessions = len(sessions)
-    in_progress = sum(1 for s in sessions if s[3] == 'in_progress')
-    completed = sum(1 for s in sessions if s[3] == 'completed')
-    
-    col1.metric("Total Sessions", total_sessions)
-    col2.metric("In Progress", in_progress)
-    col3.metric("Completed", completed)
-    
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+
+    col1.metric("Total Sessions", stats['total'])
+    col2.metric("In Progress", stats['in_progress'])
+    col3.metric("Completed", stats['completed'])
+    col4.metric("Abandoned", stats['abandoned'])
+    col5.metric("Completion Rate", f"{stats['completion_rate']:.0%}")
+    col6.metric("Started Today", stats['today'])
+
     st.markdown("---")
-    
-    # Filter
-    status_filter = st.selectbox("Filter by status", ["All", "in_progress", "completed"])
-    
+
+    # Full-text search over transcripts
+    search_text = st.text_input("🔍 Search transcripts", placeholder="VIN, email, phrase...")
+    if search_text:
+        results = search_messages(search_text, limit=20)
+        st.caption(f"{len(results)} matching session(s)")
+
+        for result in results:
+            session_id = result['session_id']
+            with st.expander(f"🔎 {session_id[:8]}... - {result['hits']} match(es)"):
+                st.markdown(result['snippet'])
+                st.write("**Transcript:**")
+                for timestamp, role, content in get_live_chat_transcript(session_id):
+                    speaker = "🤖 **Bot**" if role == "bot" else "👤 **User**"
+                    st.markdown(f"{speaker} ({format_timestamp(timestamp)}): {content}")
+
+        st.markdown("---")
+
+    # Filter, sort order and page size
+    col1, col2, col3 = st.columns([2, 1, 1])
+    status_filter = col1.selectbox("Filter by status", ["All", "in_progress", "completed", "abandoned"])
+    sort_label = col2.selectbox("Sort by", ["Started", "Last activity"])
+    page_size = col3.selectbox("Per page", [10, 25, 50, 100], index=1)
+    order_by = 'activity' if sort_label == "Last activity" else 'started'
+
+    # Cursor stack for keyset pagination; reset whenever the query changes
+    query_key = (status_filter, order_by, page_size)
+    if state.get('monitor_query') != query_key:
+        state.monitor_query = query_key
+        state.monitor_cursors = [None]
+
+    cursors = state.monitor_cursors
+    page_key = (status_filter, order_by, page_size, cursors[-1])
+    if data_changed or state.monitor_page is None or state.monitor_page[0] != page_key:
+        sessions, next_cursor = get_sessions_page(
+            status=None if status_filter == "All" else status_filter,
+            before=cursors[-1],
+            limit=page_size,
+            order_by=order_by
+        )
+        state.monitor_page = (page_key, sessions, next_cursor)
+    _, sessions, next_cursor = state.monitor_page
+
+    # Keep cached transcripts only for sessions on the current page
+    page_ids = {session[0] for session in sessions}
+    for session_id in list(state.monitor_transcripts):
+        if session_id not in page_ids:
+            del state.monitor_transcripts[session_id]
+
     # Display sessions
     for session in sessions:
-        session_id, started_at, completed_at, status, full_name, email, zip_code = session
-        
-        if status_filter != "All" and status != status_filter:
-            continue
-        
-        status_emoji = "🟢" if status == "in_progress" else "✅"
+        (session_id, started_at, completed_at, status, full_name, email, zip_code,
+         message_count, last_message_at) = session
+
+        status_emoji = {"in_progress": "🟢", "abandoned": "🟠"}.get(status, "✅")
         name_display = full_name if full_name else "Anonymous"
-        
-        with st.expander(f"{status_emoji} {name_display} - {session_id[:8]}... ({started_at})"):
+
+        with st.expander(f"{status_emoji} {name_display} - {session_id[:8]}... ({format_timestamp(started_at)})"):
             col1, col2 = st.columns([2, 3])
-            
+
             with col1:
                 st.write("**Session Info:**")
                 st.write(f"- **Status:** {status}")
-                st.write(f"- **Started:** {started_at}")
+                st.write(f"- **Started:** {format_timestamp(started_at)}")
+                st.write(f"- **Messages:** {message_count}")
+                if last_message_at:
+                    st.write(f"- **Last activity:** {format_timestamp(last_message_at)}")
                 if completed_at:
-                    st.write(f"- **Completed:** {completed_at}")
+                    st.write(f"- **Completed:** {format_timestamp(completed_at)}")
                 if email:
                     st.write(f"- **Email:** {email}")
                 if zip_code:
                     st.write(f"- **Zip:** {zip_code}")
-            
+
             with col2:
                 st.write("**Live Chat Transcript:**")
-                
-                # Get live transcript
-                messages = get_live_chat_transcript(session_id)
-                
+
+                # Live transcript, loaded once then extended from the message feed
+                if session_id not in state.monitor_transcripts:
+                    state.monitor_transcripts[session_id] = load_transcript(session_id)
+                messages = state.monitor_transcripts[session_id]['messages']
+
                 for timestamp, role, content in messages:
                     if role == "bot":
-                        st.markdown(f"🤖 **Bot** ({timestamp}):")
+                        st.markdown(f"🤖 **Bot** ({format_timestamp(timestamp)}):")
                         st.info(content)
                     else:
-                        st.markdown(f"👤 **User** ({timestamp}):")
+                        st.markdown(f"👤 **User** ({format_timestamp(timestamp)}):")
                         st.success(content)
-            
+
             # Show full details button
             if status == "completed":
                 if st.button(f"View Final Data", key=f"view_{session_id}"):
                     details = get_session_details(session_id)
                     if details['final_data']:
-                        st.json(details['final_data'])
\ No newline at end of file
+                        st.json(details['final_data'])
+
+    # Pagination controls
+    col1, col2, col3 = st.columns([1, 2, 1])
+    col2.caption(f"Page {len(cursors)}")
+
+    if col1.button("⬅️ Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+
+    if col3.button("Older ➡️", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
+if auto_refresh:
+    time.sleep(refresh_seconds)
+    st.rerun()
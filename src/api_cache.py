@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from src.db_pool import ConnectionPool
+
+MAX_ENTRIES = 4096
+
+
+class ApiCache:
+    """
+    Two-tier cache for outbound API responses.
+    Entries live in an in-process LRU and, when a path is given, in a SQLite
+    table so they survive restarts and are shared between processes. Every
+    entry carries its own expiry, so failed lookups can be cached for less
+    time than successful ones. Values must be JSON-serializable.
+    """
+
+    def __init__(self, path=None, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ConnectionPool(path) if path else None
+        self._schema_ready = False
+        self._counters = {}
+
+    def _count(self, namespace, counter):
+        counters = self._counters.setdefault(
+            namespace, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        )
+        counters[counter] += 1
+
+    def _ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self._pool.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS api_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at INTEGER NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+        self._schema_ready = True
+
+    def _remember(self, namespace, key, value, expires_at):
+        with self._lock:
+            self._entries[(namespace, key)] = (expires_at, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, namespace, key):
+        """Return the cached value, or None if missing or expired"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end((namespace, key))
+                    self._count(namespace, 'memory_hits')
+                    return entry[1]
+                del self._entries[(namespace, key)]
+
+        if self._pool is not None:
+            try:
+                self._ensure_schema()
+                with self._pool.reader() as conn:
+                    row = conn.execute("""
+                        SELECT value, expires_at FROM api_cache
+                        WHERE namespace = ? AND key = ? AND expires_at > ?
+                    """, (namespace, key, int(now))).fetchone()
+            except Exception as e:
+                print(f"API cache read failed: {e}")
+                row = None
+
+            if row is not None:
+                value = json.loads(row[0])
+                self._remember(namespace, key, value, row[1])
+                with self._lock:
+                    self._count(namespace, 'disk_hits')
+                return value
+
+        with self._lock:
+            self._count(namespace, 'misses')
+        return None
+
+    def set(self, namespace, key, value, ttl):
+        """Cache value for ttl seconds"""
+        expires_at = int(time.time() + ttl)
+        self._remember(namespace, key, value, expires_at)
+
+        with self._lock:
+            self._count(namespace, 'stores')
+
+        if self._pool is not None:
+            try:
+                self._ensure_schema()
+                with self._pool.writer() as conn:
+                    conn.execute("""
+                        INSERT OR REPLACE INTO api_cache (namespace, key, value, expires_at)
+                        VALUES (?, ?, ?, ?)
+                    """, (namespace, key, json.dumps(value), expires_at))
+            except Exception as e:
+                print(f"API cache write failed: {e}")
+
+    def purge_expired(self):
+        """Delete expired rows from the SQLite tier; returns the number removed"""
+        if self._pool is None:
+            return 0
+        self._ensure_schema()
+        with self._pool.writer() as conn:
+            return conn.execute(
+                "DELETE FROM api_cache WHERE expires_at <= ?", (int(time.time()),)
+            ).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._pool is not None:
+            self._ensure_schema()
+            with self._pool.writer() as conn:
+                conn.execute("DELETE FROM api_cache")
+
+    def stats(self):
+        """Hit/miss counters per namespace, plus the in-process entry count"""
+        with self._lock:
+            stats = {namespace: dict(counters) for namespace, counters in self._counters.items()}
+            for counters in stats.values():
+                lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+                hits = counters['memory_hits'] + counters['disk_hits']
+                counters['hit_rate'] = hits / lookups if lookups else 0.0
+            return {'entries': len(self._entries), 'namespaces': stats}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
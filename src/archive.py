@@ -0,0 +1,33 @@
+"""
+Archive old transcripts out of the hot messages table.
+
+Usage:
+    python -m src.archive --days 30
+
+Sessions completed or abandoned more than --days ago have their messages
+packed into one compressed row in session_archive; the monitor and
+get_session_details keep reading them transparently.
+"""
+import argparse
+from pathlib import Path
+
+from src import database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive old chat transcripts")
+    parser.add_argument("--days", type=int, default=30, help="Archive sessions finished more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=100, help="Sessions archived per transaction")
+    parser.add_argument("--db", help="Database path (default: survey_data.db)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.DB_PATH = Path(args.db)
+    database.init_database()
+
+    archived = database.archive_old_sessions(days=args.days, batch_size=args.batch_size)
+    print(f"Archived {archived} sessions")
+
+
+if __name__ == "__main__":
+    main()
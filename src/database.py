@@ -1,225 +1,1301 @@
-import sqlite3
+import atexit
 import json
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
 from datetime import datetime
 from pathlib import Path
 
+from src.read_cache import ReadCache
+from src.storage import SQLiteBackend, backend_from_env
+from src.write_behind import WriteBehindQueue
+
 DB_PATH = Path("survey_data.db")
 
+_backend_instance = None
+_backend_configured = False
+_backend_lock = threading.Lock()
+
+# Optional background writer (see enable_write_behind)
+_write_behind = None
+
+# Read-through cache for query functions, invalidated by the write functions
+# and by commits from other processes (see _foreign_data_version)
+def _foreign_data_version():
+    try:
+        return tuple(pool.foreign_data_version() for pool in _pools())
+    except sqlite3.Error:
+        # Backend being swapped or closed; configure_storage clears the cache anyway
+        return None
+
+_read_cache = ReadCache(external_version=_foreign_data_version)
+
+# Pools whose schema is known to be current in this process (see init_database)
+_initialized_pools = weakref.WeakSet()
+_init_lock = threading.Lock()
+
+
+def _backend():
+    """
+    Return the active storage backend. Unless configure_storage() was called,
+    it is built from DB_BACKEND (see src.storage), defaulting to one SQLite
+    file at DB_PATH.
+    """
+    global _backend_instance
+
+    with _backend_lock:
+        stale_default = (
+            not _backend_configured
+            and isinstance(_backend_instance, SQLiteBackend)
+            and _backend_instance.path != Path(DB_PATH)
+        )
+        if _backend_instance is None or stale_default:
+            if _backend_instance is not None:
+                _backend_instance.close()
+            _backend_instance = backend_from_env(DB_PATH)
+            _read_cache.clear()
+        return _backend_instance
+
+
+def _pool_for(session_id):
+    """Connection pool of the shard that holds this session"""
+    return _backend().pool_for(session_id)
+
+
+def _pools():
+    """Connection pools of every shard, for queries that span sessions"""
+    return _backend().pools
+
+
+def configure_storage(backend):
+    """
+    Use a specific backend (e.g. ShardedSQLiteBackend or MemoryBackend from
+    src.storage) instead of the default. Call init_database() afterwards.
+    """
+    global _backend_instance, _backend_configured
+
+    flush_writes()
+    with _backend_lock:
+        if _backend_instance is not None:
+            _backend_instance.close()
+        _backend_instance = backend
+        _backend_configured = True
+        _read_cache.clear()
+
+
+def close_database():
+    """Close all pooled connections (called automatically at exit)"""
+    global _backend_instance
+
+    stop_idle_sweeper()
+    with _backend_lock:
+        if _backend_instance is not None:
+            _backend_instance.close()
+            _backend_instance = None
+
+
+atexit.register(close_database)
+
+
+def enable_write_behind(**options):
+    """
+    Queue save_message/update_session_data/create_session writes and commit
+    them from a background thread in grouped transactions.
+    complete_session always flushes pending writes first. Safe to call on
+    every Streamlit rerun.
+    """
+    global _write_behind
+
+    if _write_behind is None:
+        _write_behind = WriteBehindQueue(_apply_write_batch, **options)
+        # Registered after close_database, so it runs first at exit
+        atexit.register(disable_write_behind)
+    _write_behind.start()
+
+
+def disable_write_behind():
+    """Drain any queued writes and go back to synchronous writes"""
+    global _write_behind
+
+    if _write_behind is not None:
+        writer, _write_behind = _write_behind, None
+        writer.stop()
+
+
+def flush_writes(timeout=None):
+    """Block until queued writes are committed (no-op without write-behind)"""
+    if _write_behind is None:
+        return True
+    return _write_behind.flush(timeout)
+
+
+def _now_ms():
+    """Current time as integer epoch milliseconds (the stored timestamp format)"""
+    return int(time.time() * 1000)
+
+
+def format_timestamp(value):
+    """Render a stored epoch-millisecond timestamp for display"""
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000).strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+def _apply_write_batch(ops):
+    """
+    Write a batch of queued operations, one transaction per shard. A failed
+    shard is retried op by op on its own; shards that already committed are
+    not replayed, so messages and turn events are never written twice.
+    """
+    by_pool = {}
+    for op in ops:
+        session_id = op[-1] if op[0] == 'update' else op[1]
+        by_pool.setdefault(_pool_for(session_id), []).append(op)
+
+    for pool, pool_ops in by_pool.items():
+        try:
+            _apply_shard_batch(pool, pool_ops)
+        except Exception as e:
+            print(f"Write-behind shard batch failed ({len(pool_ops)} ops), retrying individually: {e}")
+
+            # Isolate the bad operation so the rest of the shard's batch is not lost
+            for op in pool_ops:
+                try:
+                    _apply_shard_batch(pool, [op])
+                except Exception as e:
+                    print(f"Write-behind dropped operation {op[0]!r}: {e}")
+
+
+def _apply_shard_batch(pool, ops):
+    """Write one shard's share of a batch in a single transaction"""
+    creates = []
+    messages = []
+    updates = {}
+    events = []
+
+    for op in ops:
+        kind, args = op[0], op[1:]
+        if kind == 'create':
+            creates.append(args)
+        elif kind == 'message':
+            messages.append(args)
+        elif kind == 'update':
+            # Later snapshots of the same session supersede earlier ones
+            updates[args[-1]] = args
+        elif kind == 'event':
+            events.append(args)
+
+    with pool.writer() as conn:
+        if creates:
+            conn.executemany(_INSERT_SESSION_SQL, creates)
+        if messages:
+            conn.executemany(_INSERT_MESSAGE_SQL, messages)
+        if updates:
+            conn.executemany(_UPDATE_SESSION_SQL, list(updates.values()))
+        if events:
+            cursor = conn.cursor()
+            for args in events:
+                _write_turn_event(cursor, *args)
+
+    _read_cache.bump(
+        {args[0] for args in creates} | {args[0] for args in messages}
+        | set(updates) | {args[0] for args in events}
+    )
+
+
 def init_database():
-    """Initialize the SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Sessions table - tracks each conversation
+    """
+    Initialize the SQLite database (every shard of the active backend) and
+    apply pending migrations. Each shard is checked once per process, so
+    Streamlit reruns cost a set lookup.
+    """
+    for pool in _pools():
+        if pool in _initialized_pools:
+            continue
+        with _init_lock:
+            if pool not in _initialized_pools:
+                _init_shard(pool)
+                _initialized_pools.add(pool)
+
+
+def _schema_version(conn):
+    """Highest applied migration, or None if schema_version does not exist yet"""
+    exists = conn.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'
+    """).fetchone()
+    if not exists:
+        return None
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def _init_shard(pool):
+    # Cheap read first: an up-to-date database never takes the write lock
+    with pool.reader() as conn:
+        if (_schema_version(conn) or 0) >= len(_MIGRATIONS):
+            return
+
+    with pool.writer() as conn:
+        cursor = conn.cursor()
+
+        # Another process may have migrated while we waited for the lock
+        version = _schema_version(conn)
+        if version is not None and version >= len(_MIGRATIONS):
+            return
+
+        # Sessions table - tracks each conversation
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP,
+                status TEXT DEFAULT 'in_progress',
+                zip_code TEXT,
+                full_name TEXT,
+                email TEXT,
+                license_type TEXT,
+                license_status TEXT
+            )
+        """)
+
+        # Messages table - stores LIVE chat transcript
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                role TEXT,
+                content TEXT,
+                FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+            )
+        """)
+
+        # Vehicles table - stores vehicle info
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vehicles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT,
+                vehicle_identifier TEXT,
+                vehicle_use TEXT,
+                blind_spot_warning TEXT,
+                commute_days_per_week INTEGER,
+                commute_one_way_miles INTEGER,
+                annual_mileage INTEGER,
+                FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+            )
+        """)
+
+        # Survey data table - stores final JSON
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS survey_data (
+                session_id TEXT PRIMARY KEY,
+                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                raw_data TEXT,
+                FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+            )
+        """)
+
+        # Migration history; one row per applied migration
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at INTEGER
+            )
+        """)
+
+        if version is None:
+            # Databases migrated before schema_version existed tracked PRAGMA user_version
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            cursor.executemany("""
+                INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, NULL)
+            """, [(number, _MIGRATIONS[number - 1].__name__) for number in range(1, version + 1)])
+
+        # Bring older databases up to the current schema version
+        for number, migration in enumerate(_MIGRATIONS[version:], start=version + 1):
+            migration(cursor)
+            cursor.execute("""
+                INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)
+            """, (number, migration.__name__, _now_ms()))
+            # Kept in step for tools that still read user_version
+            cursor.execute(f"PRAGMA user_version = {number}")
+
+    _read_cache.clear()
+
+
+def _migrate_epoch_timestamps(cursor):
+    """Schema v1: integer epoch-ms timestamps plus lookup/sort indexes"""
+    # Older rows hold local-time datetime.now() text
+    for table, column in [
+        ('sessions', 'started_at'),
+        ('sessions', 'completed_at'),
+        ('messages', 'timestamp'),
+        ('survey_data', 'completed_at'),
+    ]:
+        cursor.execute(f"""
+            UPDATE {table}
+            SET {column} = CAST((julianday({column}, 'utc') - 2440587.5) * 86400000 AS INTEGER)
+            WHERE typeof({column}) = 'text'
+        """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_status_started ON sessions (status, started_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions (started_at)")
+
+
+def _migrate_message_search(cursor):
+    """Schema v2: FTS5 index over message content, kept in sync by triggers"""
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sessions (
-            session_id TEXT PRIMARY KEY,
-            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            completed_at TIMESTAMP,
-            status TEXT DEFAULT 'in_progress',
-            zip_code TEXT,
-            full_name TEXT,
-            email TEXT,
-            license_type TEXT,
-            license_status TEXT
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content,
+            content='messages',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
         )
     """)
-    
-    # Messages table - stores LIVE chat transcript
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+    """)
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+
+    # Index messages written before this migration
+    cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+
+def _migrate_funnel_analytics(cursor):
+    """Schema v3: per-turn events plus incrementally maintained rollups"""
+    # Raw per-turn events
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS turn_events (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             session_id TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            role TEXT,
-            content TEXT,
+            question_id TEXT,
+            attempt INTEGER,
+            outcome TEXT,
+            elapsed_ms INTEGER,
+            created_at INTEGER,
             FOREIGN KEY (session_id) REFERENCES sessions (session_id)
         )
     """)
-    
-    # Vehicles table - stores vehicle info
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_turn_events_session ON turn_events (session_id, id)")
+
+    # One row per question, updated with every event
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS vehicles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        CREATE TABLE IF NOT EXISTS question_rollup (
+            question_id TEXT PRIMARY KEY,
+            sessions_reached INTEGER NOT NULL DEFAULT 0,
+            turns INTEGER NOT NULL DEFAULT 0,
+            accepted INTEGER NOT NULL DEFAULT 0,
+            reask INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            frustration INTEGER NOT NULL DEFAULT 0,
+            stopped INTEGER NOT NULL DEFAULT 0,
+            error INTEGER NOT NULL DEFAULT 0,
+            total_elapsed_ms INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Time-per-turn histogram, used to read medians without touching events
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS question_time_histogram (
+            question_id TEXT,
+            bucket INTEGER,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (question_id, bucket)
+        ) WITHOUT ROWID
+    """)
+
+    # Which questions each session has reached (for sessions_reached)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS session_questions_reached (
             session_id TEXT,
-            vehicle_identifier TEXT,
-            vehicle_use TEXT,
-            blind_spot_warning TEXT,
-            commute_days_per_week INTEGER,
-            commute_one_way_miles INTEGER,
-            annual_mileage INTEGER,
+            question_id TEXT,
+            PRIMARY KEY (session_id, question_id)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migrate_export_indexes(cursor):
+    """Schema v4: per-session vehicle lookups for exports"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_session ON vehicles (session_id, id)")
+
+
+def _migrate_transcript_archive(cursor):
+    """Schema v5: compressed per-session transcript archive"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS session_archive (
+            session_id TEXT PRIMARY KEY,
+            archived_at INTEGER,
+            message_count INTEGER,
+            last_message_id INTEGER,
+            transcript BLOB,
             FOREIGN KEY (session_id) REFERENCES sessions (session_id)
         )
     """)
-    
-    # Survey data table - stores final JSON
+
+
+def _migrate_session_cursor_indexes(cursor):
+    """Schema v6: session list indexes that match the (started_at, session_id) page cursor"""
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_status_started")
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_started")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_status_started ON sessions (status, started_at, session_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions (started_at, session_id)")
+
+
+def _migrate_session_summary(cursor):
+    """Schema v7: trigger-maintained per-session activity summary"""
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS survey_data (
+        CREATE TABLE IF NOT EXISTS session_summary (
             session_id TEXT PRIMARY KEY,
-            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            raw_data TEXT,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            last_message_at INTEGER,
+            last_role TEXT,
+            current_question_id TEXT,
             FOREIGN KEY (session_id) REFERENCES sessions (session_id)
         )
     """)
-    
-    conn.commit()
-    conn.close()
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_session_summary_activity
+        ON session_summary (last_message_at, session_id)
+    """)
+
+    # A new session counts as activity, so idle sessions without messages are swept too
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS session_summary_session AFTER INSERT ON sessions BEGIN
+            INSERT OR IGNORE INTO session_summary (session_id, last_message_at)
+            VALUES (new.session_id, new.started_at);
+        END
+    """)
+    # Every message bumps the counters; a message on an abandoned session revives it
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS session_summary_message AFTER INSERT ON messages BEGIN
+            INSERT INTO session_summary (session_id, message_count, last_message_at, last_role)
+            VALUES (new.session_id, 1, new.timestamp, new.role)
+            ON CONFLICT (session_id) DO UPDATE SET
+                message_count = message_count + 1,
+                last_message_at = MAX(COALESCE(last_message_at, 0), excluded.last_message_at),
+                last_role = excluded.last_role;
+            UPDATE sessions SET status = 'in_progress'
+            WHERE session_id = new.session_id AND status = 'abandoned';
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS session_summary_turn AFTER INSERT ON turn_events BEGIN
+            UPDATE session_summary SET current_question_id = new.question_id
+            WHERE session_id = new.session_id;
+        END
+    """)
+
+    # Backfill from existing rows
+    cursor.execute("""
+        INSERT OR REPLACE INTO session_summary (
+            session_id, message_count, last_message_at, last_role, current_question_id
+        )
+        SELECT s.session_id,
+               (SELECT COUNT(*) FROM messages m WHERE m.session_id = s.session_id),
+               COALESCE((SELECT MAX(m.timestamp) FROM messages m WHERE m.session_id = s.session_id), s.started_at),
+               (SELECT m.role FROM messages m WHERE m.session_id = s.session_id ORDER BY m.id DESC LIMIT 1),
+               (SELECT t.question_id FROM turn_events t WHERE t.session_id = s.session_id ORDER BY t.id DESC LIMIT 1)
+        FROM sessions s
+    """)
+
+
+def _migrate_turn_model_tier(cursor):
+    """Schema v8: which validator tier answered each turn, with a per-question rollup"""
+    cursor.execute("ALTER TABLE turn_events ADD COLUMN model_tier TEXT")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS question_tier_rollup (
+            question_id TEXT,
+            model_tier TEXT,
+            turns INTEGER NOT NULL DEFAULT 0,
+            accepted INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (question_id, model_tier)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migrate_last_question_id(cursor):
+    """
+    Schema v9: session_summary.current_question_id held the question that
+    was just answered, not the one being asked, so it is renamed to match.
+    SQLite rewrites the session_summary_turn trigger along with the column.
+    """
+    cursor.execute("ALTER TABLE session_summary RENAME COLUMN current_question_id TO last_question_id")
+
+
+# Ordered schema migrations; append only. schema_version records which have run.
+_MIGRATIONS = [
+    _migrate_epoch_timestamps,
+    _migrate_message_search,
+    _migrate_funnel_analytics,
+    _migrate_export_indexes,
+    _migrate_transcript_archive,
+    _migrate_session_cursor_indexes,
+    _migrate_session_summary,
+    _migrate_turn_model_tier,
+    _migrate_last_question_id,
+]
+
+_INSERT_SESSION_SQL = """
+    INSERT OR IGNORE INTO sessions (session_id, started_at, status)
+    VALUES (?, ?, 'in_progress')
+"""
+
+_INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (session_id, timestamp, role, content)
+    VALUES (?, ?, ?, ?)
+"""
+
+_UPDATE_SESSION_SQL = """
+    UPDATE sessions
+    SET zip_code = ?, full_name = ?, email = ?,
+        license_type = ?, license_status = ?
+    WHERE session_id = ?
+"""
+
+TURN_OUTCOMES = ['accepted', 'reask', 'skipped', 'frustration', 'stopped', 'error']
+
+# Upper bounds (seconds) of the time-per-turn histogram buckets; the last is open-ended
+TURN_TIME_BUCKETS = [1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120, 180, 300, 600]
+
+def _turn_time_bucket(elapsed_ms):
+    for bucket, upper in enumerate(TURN_TIME_BUCKETS):
+        if elapsed_ms <= upper * 1000:
+            return bucket
+    return len(TURN_TIME_BUCKETS)
+
+def _write_turn_event(cursor, session_id, created_at, question_id, attempt, outcome, elapsed_ms, model_tier=None):
+    """Insert one turn event and fold it into the rollup tables"""
+    cursor.execute("""
+        INSERT INTO turn_events (session_id, question_id, attempt, outcome, elapsed_ms, created_at, model_tier)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (session_id, question_id, attempt, outcome, elapsed_ms, created_at, model_tier))
+
+    if model_tier is not None:
+        cursor.execute("""
+            INSERT INTO question_tier_rollup (question_id, model_tier, turns, accepted)
+            VALUES (?, ?, 1, ?)
+            ON CONFLICT (question_id, model_tier) DO UPDATE SET
+                turns = turns + 1,
+                accepted = accepted + excluded.accepted
+        """, (question_id, model_tier, int(outcome == 'accepted')))
+
+    cursor.execute("""
+        INSERT OR IGNORE INTO session_questions_reached (session_id, question_id)
+        VALUES (?, ?)
+    """, (session_id, question_id))
+    first_visit = cursor.rowcount == 1
+
+    counts = [1 if outcome == name else 0 for name in TURN_OUTCOMES]
+    cursor.execute("""
+        INSERT INTO question_rollup (
+            question_id, sessions_reached, turns,
+            accepted, reask, skipped, frustration, stopped, error,
+            total_elapsed_ms
+        ) VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (question_id) DO UPDATE SET
+            sessions_reached = sessions_reached + excluded.sessions_reached,
+            turns = turns + 1,
+            accepted = accepted + excluded.accepted,
+            reask = reask + excluded.reask,
+            skipped = skipped + excluded.skipped,
+            frustration = frustration + excluded.frustration,
+            stopped = stopped + excluded.stopped,
+            error = error + excluded.error,
+            total_elapsed_ms = total_elapsed_ms + excluded.total_elapsed_ms
+    """, (question_id, int(first_visit), *counts, elapsed_ms))
+
+    cursor.execute("""
+        INSERT INTO question_time_histogram (question_id, bucket, count)
+        VALUES (?, ?, 1)
+        ON CONFLICT (question_id, bucket) DO UPDATE SET count = count + 1
+    """, (question_id, _turn_time_bucket(elapsed_ms)))
 
 def create_session(session_id):
     """Create a new chat session"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT OR IGNORE INTO sessions (session_id, started_at, status)
-        VALUES (?, ?, 'in_progress')
-    """, (session_id, datetime.now()))
-    
-    conn.commit()
-    conn.close()
+    params = (session_id, _now_ms())
+
+    if _write_behind is not None:
+        _write_behind.submit(('create',) + params)
+        return
+
+    with _pool_for(session_id).writer() as conn:
+        conn.execute(_INSERT_SESSION_SQL, params)
+    _read_cache.bump([session_id])
 
 def save_message(session_id, role, content):
     """Save a message to the database in REAL-TIME"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT INTO messages (session_id, timestamp, role, content)
-        VALUES (?, ?, ?, ?)
-    """, (session_id, datetime.now(), role, content))
-    
-    conn.commit()
-    conn.close()
+    params = (session_id, _now_ms(), role, content)
+
+    if _write_behind is not None:
+        _write_behind.submit(('message',) + params)
+        return
+
+    with _pool_for(session_id).writer() as conn:
+        conn.execute(_INSERT_MESSAGE_SQL, params)
+    _read_cache.bump([session_id])
 
 def update_session_data(session_id, data):
     """Update session with personal info as it's collected"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     personal = data.get('personal_info', {})
     license_info = data.get('license', {})
-    
-    cursor.execute("""
-        UPDATE sessions
-        SET zip_code = ?, full_name = ?, email = ?, 
-            license_type = ?, license_status = ?
-        WHERE session_id = ?
-    """, (
+
+    params = (
         personal.get('zip_code'),
         personal.get('full_name'),
         personal.get('email'),
         license_info.get('type'),
         license_info.get('status'),
         session_id
-    ))
-    
-    conn.commit()
-    conn.close()
+    )
+
+    if _write_behind is not None:
+        _write_behind.submit(('update',) + params)
+        return
+
+    with _pool_for(session_id).writer() as conn:
+        conn.execute(_UPDATE_SESSION_SQL, params)
+    _read_cache.bump([session_id])
+
+def record_turn_event(session_id, event):
+    """
+    Persist a turn event from InsuranceChatbotSession.last_turn
+    (question_id, attempt, outcome, elapsed_ms, model_tier) and update the rollups.
+    """
+    params = (
+        session_id,
+        _now_ms(),
+        event['question_id'],
+        event.get('attempt', 0),
+        event['outcome'],
+        event.get('elapsed_ms', 0),
+        event.get('model_tier')
+    )
+
+    if _write_behind is not None:
+        _write_behind.submit(('event',) + params)
+        return
+
+    with _pool_for(session_id).writer() as conn:
+        _write_turn_event(conn.cursor(), *params)
+    _read_cache.bump([session_id])
 
 def complete_session(session_id, data):
     """Mark session as complete and save final data"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Update session status
-    cursor.execute("""
-        UPDATE sessions
-        SET status = 'completed', completed_at = ?
-        WHERE session_id = ?
-    """, (datetime.now(), session_id))
-    
-    # Save final survey data
-    cursor.execute("""
-        INSERT OR REPLACE INTO survey_data (session_id, completed_at, raw_data)
-        VALUES (?, ?, ?)
-    """, (session_id, datetime.now(), json.dumps(data)))
-    
-    # Save vehicles
-    vehicles = data.get('vehicles', [])
-    for vehicle in vehicles:
+    # Pending messages and updates must land before the session is closed
+    flush_writes()
+    completed_at = _now_ms()
+
+    with _pool_for(session_id).writer() as conn:
+        cursor = conn.cursor()
+
+        # Update session status
         cursor.execute("""
+            UPDATE sessions
+            SET status = 'completed', completed_at = ?
+            WHERE session_id = ?
+        """, (completed_at, session_id))
+
+        # Save final survey data
+        cursor.execute("""
+            INSERT OR REPLACE INTO survey_data (session_id, completed_at, raw_data)
+            VALUES (?, ?, ?)
+        """, (session_id, completed_at, json.dumps(data)))
+
+        # Save vehicles (replacing any from an earlier completion of this session)
+        cursor.execute("DELETE FROM vehicles WHERE session_id = ?", (session_id,))
+        vehicles = data.get('vehicles', [])
+        cursor.executemany("""
             INSERT INTO vehicles (
                 session_id, vehicle_identifier, vehicle_use,
                 blind_spot_warning, commute_days_per_week,
                 commute_one_way_miles, annual_mileage
             ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            session_id,
-            vehicle.get('vehicle_identifier'),
-            vehicle.get('vehicle_use'),
-            vehicle.get('blind_spot_warning'),
-            vehicle.get('commute_days_per_week'),
-            vehicle.get('commute_one_way_miles'),
-            vehicle.get('annual_mileage')
-        ))
-    
-    conn.commit()
-    conn.close()
+        """, [
+            (
+                session_id,
+                vehicle.get('vehicle_identifier'),
+                vehicle.get('vehicle_use'),
+                vehicle.get('blind_spot_warning'),
+                vehicle.get('commute_days_per_week'),
+                vehicle.get('commute_one_way_miles'),
+                vehicle.get('annual_mileage')
+            )
+            for vehicle in vehicles
+        ])
+
+    _read_cache.bump([session_id])
+
+def _pack_transcript(messages):
+    return zlib.compress(json.dumps(messages).encode("utf-8"), 9)
+
+def _unpack_transcript(blob):
+    return [tuple(message) for message in json.loads(zlib.decompress(blob).decode("utf-8"))]
+
+def _read_messages(conn, session_id, after_id=0, limit=-1):
+    """
+    Messages (id, timestamp, role, content) of a session with id > after_id,
+    reading the archive tier first and then the hot messages table.
+    A negative limit means no limit.
+    """
+    messages = []
+
+    archived = conn.execute("""
+        SELECT last_message_id, transcript FROM session_archive WHERE session_id = ?
+    """, (session_id,)).fetchone()
+    if archived and archived[0] > after_id:
+        messages = [m for m in _unpack_transcript(archived[1]) if m[0] > after_id]
+        if limit >= 0:
+            messages = messages[:limit]
+
+    remaining = limit - len(messages) if limit >= 0 else -1
+    if remaining != 0:
+        messages += conn.execute("""
+            SELECT id, timestamp, role, content
+            FROM messages
+            WHERE session_id = ? AND id > ?
+            ORDER BY id ASC
+            LIMIT ?
+        """, (session_id, after_id, remaining)).fetchall()
+
+    return messages
+
+def archive_old_sessions(days=30, batch_size=100):
+    """
+    Move transcripts of sessions completed or abandoned more than `days` ago
+    into session_archive (one compressed blob per session) and delete their
+    hot message rows. Reads through the transcript functions are unaffected.
+    Archived messages drop out of full-text search. Returns the number of
+    sessions archived.
+    """
+    cutoff = _now_ms() - days * 24 * 60 * 60 * 1000
+    total = 0
+
+    for pool in _pools():
+        while True:
+            with pool.writer() as conn:
+                session_ids = [row[0] for row in conn.execute("""
+                    SELECT s.session_id
+                    FROM sessions s
+                    LEFT JOIN session_summary ss ON ss.session_id = s.session_id
+                    WHERE ((s.status = 'completed' AND s.completed_at < ?)
+                           OR (s.status = 'abandoned' AND COALESCE(ss.last_message_at, s.started_at) < ?))
+                      AND EXISTS (SELECT 1 FROM messages m WHERE m.session_id = s.session_id)
+                    LIMIT ?
+                """, (cutoff, cutoff, batch_size))]
+
+                for session_id in session_ids:
+                    # Includes anything archived earlier for this session
+                    messages = _read_messages(conn, session_id)
+
+                    conn.execute("""
+                        INSERT OR REPLACE INTO session_archive (
+                            session_id, archived_at, message_count, last_message_id, transcript
+                        ) VALUES (?, ?, ?, ?, ?)
+                    """, (session_id, _now_ms(), len(messages), messages[-1][0], _pack_transcript(messages)))
+
+                    conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+            _read_cache.bump(session_ids)
+            total += len(session_ids)
+
+            if len(session_ids) < batch_size:
+                break
+
+    return total
+
+def mark_idle_sessions_abandoned(idle_minutes=30, batch_size=500):
+    """
+    Mark in-progress sessions with no activity for idle_minutes as
+    'abandoned', in batched updates. Returns the number of sessions marked.
+    """
+    cutoff = _now_ms() - idle_minutes * 60 * 1000
+    total = 0
+
+    for pool in _pools():
+        while True:
+            with pool.writer() as conn:
+                # Walks only in-progress sessions, then probes their summary row
+                session_ids = [row[0] for row in conn.execute("""
+                    SELECT s.session_id
+                    FROM sessions s
+                    JOIN session_summary ss ON ss.session_id = s.session_id
+                    WHERE s.status = 'in_progress' AND ss.last_message_at < ?
+                    LIMIT ?
+                """, (cutoff, batch_size))]
+
+                conn.executemany("""
+                    UPDATE sessions SET status = 'abandoned'
+                    WHERE session_id = ? AND status = 'in_progress'
+                """, [(session_id,) for session_id in session_ids])
+
+            _read_cache.bump(session_ids)
+            total += len(session_ids)
+
+            if len(session_ids) < batch_size:
+                break
+
+    return total
+
+_sweeper_thread = None
+_sweeper_stop = threading.Event()
+
+def start_idle_sweeper(idle_minutes=30, interval_seconds=60):
+    """Run mark_idle_sessions_abandoned periodically on a daemon thread (idempotent)"""
+    global _sweeper_thread
+
+    if _sweeper_thread is not None and _sweeper_thread.is_alive():
+        return
+
+    def run():
+        while not _sweeper_stop.wait(interval_seconds):
+            try:
+                mark_idle_sessions_abandoned(idle_minutes)
+            except Exception as e:
+                print(f"Idle session sweep failed: {e}")
+
+    _sweeper_stop.clear()
+    _sweeper_thread = threading.Thread(target=run, name="idle-session-sweeper", daemon=True)
+    _sweeper_thread.start()
+
+def stop_idle_sweeper():
+    """Stop the background sweeper started by start_idle_sweeper"""
+    global _sweeper_thread
+
+    _sweeper_stop.set()
+    if _sweeper_thread is not None:
+        _sweeper_thread.join()
+        _sweeper_thread = None
 
 def get_live_chat_transcript(session_id):
     """Get the current chat transcript for a session"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT timestamp, role, content
-        FROM messages
-        WHERE session_id = ?
-        ORDER BY timestamp ASC
-    """, (session_id,))
-    
-    messages = cursor.fetchall()
-    conn.close()
-    
-    return messages
+    def load():
+        with _pool_for(session_id).reader() as conn:
+            return [message[1:] for message in _read_messages(conn, session_id)]
+
+    return _read_cache.get_or_load(('transcript', session_id), session_id, load)
+
+def get_transcript_page(session_id, after_id=0, limit=100):
+    """
+    Get up to `limit` messages of a session with id greater than after_id.
+    Returns rows of (id, timestamp, role, content); pass the last id back as
+    after_id to fetch the next page.
+    """
+    def load():
+        with _pool_for(session_id).reader() as conn:
+            return _read_messages(conn, session_id, after_id or 0, limit)
+
+    key = ('transcript_page', session_id, after_id or 0, limit)
+    return _read_cache.get_or_load(key, session_id, load)
+
+def get_feed_position():
+    """Current end of the message feed (the highest message id in each shard)"""
+    position = []
+    for pool in _pools():
+        with pool.reader() as conn:
+            position.append(conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0])
+    return tuple(position)
+
+def get_messages_after(position, limit=500):
+    """
+    Tail the message log across all sessions.
+    `position` comes from get_feed_position() or a previous call. Returns
+    (rows, position): rows of (id, session_id, timestamp, role, content)
+    written after `position`, at most `limit` per shard, oldest first.
+    Message ids are only comparable within a session.
+    """
+    pools = _pools()
+    position = list(position or [0] * len(pools))
+    rows = []
+
+    for index, pool in enumerate(pools):
+        with pool.reader() as conn:
+            shard_rows = conn.execute("""
+                SELECT id, session_id, timestamp, role, content
+                FROM messages
+                WHERE id > ?
+                ORDER BY id ASC
+                LIMIT ?
+            """, (position[index], limit)).fetchall()
+
+        if shard_rows:
+            position[index] = shard_rows[-1][0]
+        rows.extend(shard_rows)
+
+    rows.sort(key=lambda row: row[2])
+    return rows, tuple(position)
+
+def get_data_version():
+    """
+    Cheap change detector: the value differs from a previous call whenever
+    anything has been committed to the database in between.
+    """
+    return tuple(pool.data_version() for pool in _pools())
 
 def get_all_sessions():
     """Get all chat sessions"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT session_id, started_at, completed_at, status, 
-               full_name, email, zip_code
-        FROM sessions
-        ORDER BY started_at DESC
-    """)
-    
-    sessions = cursor.fetchall()
-    conn.close()
-    
-    return sessions
+    def load():
+        sessions = []
+        for pool in _pools():
+            with pool.reader() as conn:
+                sessions += conn.execute("""
+                    SELECT session_id, started_at, completed_at, status,
+                           full_name, email, zip_code
+                    FROM sessions
+                    ORDER BY started_at DESC
+                """).fetchall()
+
+        sessions.sort(key=lambda session: session[1], reverse=True)
+        return sessions
+
+    return _read_cache.get_or_load(('all_sessions',), None, load)
+
+def get_sessions_page(status=None, before=None, limit=50, order_by='started'):
+    """
+    Get one page of sessions, newest first, optionally filtered by status.
+    order_by is 'started' (start time) or 'activity' (last message time).
+    `before` is the cursor returned with the previous page (None for the
+    first page). Returns (sessions, next_cursor); next_cursor is None on the
+    last page. Rows are (session_id, started_at, completed_at, status,
+    full_name, email, zip_code, message_count, last_message_at).
+    """
+    if order_by == 'activity':
+        # Driven by the session_summary activity index
+        sort_column, id_column = "ss.last_message_at", "ss.session_id"
+        from_sql = "session_summary ss JOIN sessions s ON s.session_id = ss.session_id"
+    else:
+        sort_column, id_column = "s.started_at", "s.session_id"
+        from_sql = "sessions s LEFT JOIN session_summary ss ON ss.session_id = s.session_id"
+
+    where = []
+    params = []
+
+    if status:
+        where.append("s.status = ?")
+        params.append(status)
+    if before:
+        # (sort value, session_id) is unique across shards, so no row is skipped
+        where.append(f"({sort_column}, {id_column}) < (?, ?)")
+        params.extend(before)
+
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    def load():
+        rows = []
+        for pool in _pools():
+            with pool.reader() as conn:
+                rows += conn.execute(f"""
+                    SELECT s.session_id, s.started_at, s.completed_at, s.status,
+                           s.full_name, s.email, s.zip_code,
+                           COALESCE(ss.message_count, 0), ss.last_message_at,
+                           {sort_column}
+                    FROM {from_sql}
+                    {where_sql}
+                    ORDER BY {sort_column} DESC, {id_column} DESC
+                    LIMIT ?
+                """, params + [limit]).fetchall()
+
+        rows.sort(key=lambda row: (row[-1] or 0, row[0]), reverse=True)
+        next_cursor = (rows[limit - 1][-1], rows[limit - 1][0]) if len(rows) >= limit else None
+        return [row[:-1] for row in rows[:limit]], next_cursor
+
+    key = ('sessions_page', status, tuple(before) if before else None, limit, order_by)
+    return _read_cache.get_or_load(key, None, load)
+
+def get_session_stats():
+    """
+    Summary statistics for the monitor, computed in SQLite.
+    Returns total, per-status counts (including sessions the idle sweeper
+    marked abandoned), completion rate and sessions started today.
+    """
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    midnight_ms = int(midnight.timestamp() * 1000)
+
+    def load():
+        by_status = {}
+        today = 0
+
+        for pool in _pools():
+            with pool.reader() as conn:
+                for status, count in conn.execute("""
+                    SELECT status, COUNT(*) FROM sessions GROUP BY status
+                """):
+                    by_status[status] = by_status.get(status, 0) + count
+
+                today += conn.execute("""
+                    SELECT COUNT(*) FROM sessions WHERE started_at >= ?
+                """, (midnight_ms,)).fetchone()[0]
+
+        total = sum(by_status.values())
+
+        return {
+            'total': total,
+            'by_status': by_status,
+            'in_progress': by_status.get('in_progress', 0),
+            'completed': by_status.get('completed', 0),
+            'abandoned': by_status.get('abandoned', 0),
+            'completion_rate': by_status.get('completed', 0) / total if total else 0.0,
+            'today': today
+        }
+
+    return _read_cache.get_or_load(('session_stats', midnight_ms), None, load)
 
 def get_session_details(session_id):
     """Get full details of a session including transcript"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Get session info
-    cursor.execute("""
-        SELECT * FROM sessions WHERE session_id = ?
-    """, (session_id,))
-    session = cursor.fetchone()
-    
-    # Get messages
-    cursor.execute("""
-        SELECT timestamp, role, content
-        FROM messages
-        WHERE session_id = ?
-        ORDER BY timestamp ASC
-    """, (session_id,))
-    messages = cursor.fetchall()
-    
-    # Get final data if completed
-    cursor.execute("""
-        SELECT raw_data FROM survey_data WHERE session_id = ?
-    """, (session_id,))
-    final_data = cursor.fetchone()
-    
-    conn.close()
-    
-    return {
-        'session': session,
-        'messages': messages,
-        'final_data': json.loads(final_data[0]) if final_data else None
-    }
\ No newline at end of file
+    def load():
+        with _pool_for(session_id).reader() as conn:
+            # Get session info
+            session = conn.execute("""
+                SELECT * FROM sessions WHERE session_id = ?
+            """, (session_id,)).fetchone()
+
+            # Get messages
+            messages = [message[1:] for message in _read_messages(conn, session_id)]
+
+            # Get final data if completed
+            final_data = conn.execute("""
+                SELECT raw_data FROM survey_data WHERE session_id = ?
+            """, (session_id,)).fetchone()
+
+        return {
+            'session': session,
+            'messages': messages,
+            'final_data': json.loads(final_data[0]) if final_data else None
+        }
+
+    return _read_cache.get_or_load(('details', session_id), session_id, load)
+
+# Upper bound on matching messages ranked per search (per shard)
+SEARCH_MAX_HITS = 1000
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a literal"""
+    terms = text.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def search_messages(text, limit=20):
+    """
+    Full-text search over chat transcripts.
+    Returns up to `limit` dicts of session_id, score (lower is better),
+    snippet (best matching message, matches wrapped in **) and hits, ranked
+    by each session's best match.
+    """
+    query = _fts_query(text)
+    if not query:
+        return []
+
+    def load():
+        rows = []
+        for pool in _pools():
+            with pool.reader() as conn:
+                rows += conn.execute("""
+                    WITH hits AS MATERIALIZED (
+                        SELECT rowid AS id,
+                               bm25(messages_fts) AS score,
+                               snippet(messages_fts, 0, '**', '**', '…', 12) AS snippet
+                        FROM messages_fts
+                        WHERE messages_fts MATCH ?
+                        ORDER BY rank
+                        LIMIT ?
+                    )
+                    SELECT m.session_id, MIN(hits.score) AS best, hits.snippet, COUNT(*)
+                    FROM hits JOIN messages m ON m.id = hits.id
+                    GROUP BY m.session_id
+                    ORDER BY best
+                    LIMIT ?
+                """, (query, SEARCH_MAX_HITS, limit)).fetchall()
+
+        rows.sort(key=lambda row: row[1])
+        return [
+            {'session_id': session_id, 'score': score, 'snippet': snippet, 'hits': hits}
+            for session_id, score, snippet, hits in rows[:limit]
+        ]
+
+    return _read_cache.get_or_load(('search', query, limit), None, load)
+
+def get_funnel_rollups():
+    """
+    Per-question funnel metrics read from the rollup tables only.
+    Returns {question_id: {...}} with sessions_reached, turns, outcome
+    counts, retry/skip/frustration rates and the median time per turn
+    (upper bound of the histogram bucket holding the median, in seconds).
+    """
+    def load():
+        # Sum the rollups of every shard
+        totals = {}
+        histograms = {}
+        for pool in _pools():
+            with pool.reader() as conn:
+                for row in conn.execute("""
+                    SELECT question_id, sessions_reached, turns,
+                           accepted, reask, skipped, frustration, stopped, error,
+                           total_elapsed_ms
+                    FROM question_rollup
+                """):
+                    current = totals.get(row[0], [0] * (len(row) - 1))
+                    totals[row[0]] = [a + b for a, b in zip(current, row[1:])]
+
+                for question_id, bucket, count in conn.execute("""
+                    SELECT question_id, bucket, count FROM question_time_histogram
+                """):
+                    buckets = histograms.setdefault(question_id, {})
+                    buckets[bucket] = buckets.get(bucket, 0) + count
+
+        funnel = {}
+        for question_id, row in totals.items():
+            reached, turns = row[:2]
+            outcome_counts = dict(zip(TURN_OUTCOMES, row[2:8]))
+            total_elapsed_ms = row[8]
+
+            median = None
+            seen = 0
+            for bucket, count in sorted(histograms.get(question_id, {}).items()):
+                seen += count
+                if seen * 2 >= turns:
+                    median = TURN_TIME_BUCKETS[bucket] if bucket < len(TURN_TIME_BUCKETS) else None
+                    break
+
+            funnel[question_id] = {
+                'sessions_reached': reached,
+                'turns': turns,
+                **outcome_counts,
+                'retry_rate': outcome_counts['reask'] / turns if turns else 0.0,
+                'skip_rate': outcome_counts['skipped'] / turns if turns else 0.0,
+                'frustration_rate': outcome_counts['frustration'] / turns if turns else 0.0,
+                'mean_seconds': total_elapsed_ms / turns / 1000 if turns else 0.0,
+                'median_seconds': median
+            }
+
+        return funnel
+
+    return _read_cache.get_or_load(('funnel',), None, load)
+
+def get_dropoff_by_question():
+    """
+    Abandoned sessions counted by the question of their last turn, so each
+    drop-off is charged to where that session actually stopped, whichever
+    branch it was on. Returns {question_id: count}.
+    """
+    def load():
+        dropoff = {}
+        for pool in _pools():
+            with pool.reader() as conn:
+                for question_id, count in conn.execute("""
+                    SELECT ss.last_question_id, COUNT(*)
+                    FROM sessions s JOIN session_summary ss ON ss.session_id = s.session_id
+                    WHERE s.status = 'abandoned' AND ss.last_question_id IS NOT NULL
+                    GROUP BY ss.last_question_id
+                """):
+                    dropoff[question_id] = dropoff.get(question_id, 0) + count
+        return dropoff
+
+    return _read_cache.get_or_load(('dropoff',), None, load)
+
+def get_model_tier_rollups():
+    """
+    Turns answered by each validator tier (local, cache, small, large), per
+    question: {question_id: {model_tier: {'turns': n, 'accepted': n}}}
+    """
+    def load():
+        tiers = {}
+        for pool in _pools():
+            with pool.reader() as conn:
+                for question_id, model_tier, turns, accepted in conn.execute("""
+                    SELECT question_id, model_tier, turns, accepted FROM question_tier_rollup
+                """):
+                    counts = tiers.setdefault(question_id, {}).setdefault(model_tier, {'turns': 0, 'accepted': 0})
+                    counts['turns'] += turns
+                    counts['accepted'] += accepted
+        return tiers
+
+    return _read_cache.get_or_load(('model_tiers',), None, load)
+
+VEHICLE_EXPORT_FIELDS = [
+    'vehicle_identifier', 'vehicle_use', 'blind_spot_warning',
+    'commute_days_per_week', 'commute_one_way_miles', 'annual_mileage'
+]
+
+def iter_completed_surveys(after=None, since=None, chunk_size=1000):
+    """
+    Stream completed surveys shard by shard in survey_data rowid order.
+    Yields (position, survey) where survey holds the session columns, the
+    final JSON (`data`) and its `vehicles` rows, and position is a tuple of
+    the last exported rowid per shard. Pass a position back as `after` to
+    resume. Only chunk_size surveys are in memory at a time. `since`
+    optionally limits to surveys completed at or after an epoch-ms time.
+    """
+    pools = _pools()
+    position = list(after or ())
+    position += [0] * (len(pools) - len(position))
+
+    for index, pool in enumerate(pools):
+        for rowid, survey in _iter_shard_surveys(pool, position[index], since, chunk_size):
+            position[index] = rowid
+            yield tuple(position), survey
+
+def _iter_shard_surveys(pool, after_rowid, since, chunk_size):
+    while True:
+        with pool.reader() as conn:
+            rows = conn.execute("""
+                SELECT sd.rowid, sd.session_id, sd.completed_at, sd.raw_data,
+                       s.started_at, s.zip_code, s.full_name, s.email,
+                       s.license_type, s.license_status
+                FROM survey_data sd
+                LEFT JOIN sessions s ON s.session_id = sd.session_id
+                WHERE sd.rowid > ? AND sd.completed_at >= ?
+                ORDER BY sd.rowid
+                LIMIT ?
+            """, (after_rowid, since or 0, chunk_size)).fetchall()
+
+            if not rows:
+                return
+
+            session_ids = [row[1] for row in rows]
+            placeholders = ",".join("?" * len(session_ids))
+            vehicles = {}
+            for vehicle in conn.execute(f"""
+                SELECT session_id, {', '.join(VEHICLE_EXPORT_FIELDS)}
+                FROM vehicles
+                WHERE session_id IN ({placeholders})
+                ORDER BY session_id, id
+            """, session_ids):
+                vehicles.setdefault(vehicle[0], []).append(dict(zip(VEHICLE_EXPORT_FIELDS, vehicle[1:])))
+
+        for (rowid, session_id, completed_at, raw_data, started_at,
+             zip_code, full_name, email, license_type, license_status) in rows:
+            yield rowid, {
+                'session_id': session_id,
+                'started_at': started_at,
+                'completed_at': completed_at,
+                'zip_code': zip_code,
+                'full_name': full_name,
+                'email': email,
+                'license_type': license_type,
+                'license_status': license_status,
+                'vehicles': vehicles.get(session_id, []),
+                'data': json.loads(raw_data) if raw_data else None
+            }
+
+        after_rowid = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+def get_cache_stats():
+    """Hit/miss counters for the read cache"""
+    return _read_cache.stats()
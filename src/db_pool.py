@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+
+# Connection tuning applied to every pooled connection
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KIB = 8192
+MAX_READERS = 4
+
+
+class ConnectionPool:
+    """
+    Shared SQLite connections for one database file.
+    A single writer connection (SQLite only allows one writer at a time) guarded
+    by a lock, plus a pool of read-only connections so readers never wait on it.
+    """
+
+    def __init__(self, database, uri=False, max_readers=MAX_READERS, shared_cache=False):
+        self.database = str(database)
+        self.uri = uri
+        self.shared_cache = shared_cache
+        self.max_readers = max_readers
+        self._writer_lock = threading.RLock()
+        self._writer_conn = None
+        self._writer_depth = 0
+        self._readers = queue.LifoQueue(maxsize=max_readers)
+        self._probe_lock = threading.Lock()
+        self._probe_conn = None
+        self._closed = False
+
+    def connect(self, read_only=False):
+        """Open a new tuned connection (not managed by the pool)"""
+        conn = sqlite3.connect(
+            self.database,
+            uri=self.uri,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+            if self.shared_cache:
+                # Shared-cache readers would otherwise fail fast on table locks
+                conn.execute("PRAGMA read_uncommitted = ON")
+        else:
+            # WAL lets readers keep reading while the writer commits
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """
+        Yield the shared writer connection inside a transaction.
+        Nested use from the same thread joins the outer transaction.
+        """
+        with self._writer_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+
+            if self._writer_conn is None:
+                self._writer_conn = self.connect()
+
+            conn = self._writer_conn
+            outermost = self._writer_depth == 0
+
+            if outermost:
+                conn.execute("BEGIN IMMEDIATE")
+            self._writer_depth += 1
+
+            try:
+                yield conn
+            except BaseException:
+                self._writer_depth -= 1
+                if outermost:
+                    conn.execute("ROLLBACK")
+                raise
+            else:
+                self._writer_depth -= 1
+                if outermost:
+                    conn.execute("COMMIT")
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection from the pool"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self.connect(read_only=True)
+
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                try:
+                    self._readers.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    def foreign_data_version(self):
+        """
+        PRAGMA data_version on the writer connection. Unlike data_version(),
+        it only changes when another connection commits (another process,
+        or a CLI such as the archiver), not for this pool's own writes.
+        """
+        with self._writer_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+
+            if self._writer_conn is None:
+                self._writer_conn = self.connect()
+            return self._writer_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def data_version(self):
+        """
+        PRAGMA data_version from a dedicated connection that never writes, so
+        the value changes whenever any other connection commits.
+        """
+        with self._probe_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+
+            if self._probe_conn is None:
+                self._probe_conn = self.connect(read_only=True)
+            return self._probe_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """Close every pooled connection"""
+        self._closed = True
+
+        with self._probe_lock:
+            if self._probe_conn is not None:
+                self._probe_conn.close()
+                self._probe_conn = None
+
+        with self._writer_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,125 @@
+"""
+Bulk export of completed surveys for downstream quoting systems.
+
+Usage:
+    python -m src.export --format jsonl --output surveys.jsonl
+    python -m src.export --format csv --state-file export.state --output nightly.csv
+
+Rows are streamed from SQLite in chunks, so memory stays constant no matter
+how many surveys are exported. With --state-file the last exported
+survey_data rowid (one per shard) is stored and the next run only exports
+newer surveys.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from src import database
+from src.database import iter_completed_surveys, format_timestamp, VEHICLE_EXPORT_FIELDS
+
+SESSION_FIELDS = [
+    'session_id', 'started_at', 'completed_at', 'zip_code', 'full_name',
+    'email', 'license_type', 'license_status'
+]
+
+CSV_FIELDS = SESSION_FIELDS + ['vehicle_index'] + VEHICLE_EXPORT_FIELDS
+
+
+def export_jsonl(out, surveys):
+    """Write one JSON object per survey; returns (count, last_position)"""
+    count = 0
+    last_position = None
+
+    for position, survey in surveys:
+        survey = {**survey, 'started_at': format_timestamp(survey['started_at']),
+                  'completed_at': format_timestamp(survey['completed_at'])}
+        out.write(json.dumps(survey) + "\n")
+        count += 1
+        last_position = position
+
+    return count, last_position
+
+
+def export_csv(out, surveys):
+    """Write one row per vehicle (or one empty-vehicle row); returns (count, last_position)"""
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    last_position = None
+
+    for position, survey in surveys:
+        base = {field: survey[field] for field in SESSION_FIELDS}
+        base['started_at'] = format_timestamp(survey['started_at'])
+        base['completed_at'] = format_timestamp(survey['completed_at'])
+
+        vehicles = survey['vehicles'] or [{}]
+        for index, vehicle in enumerate(vehicles, start=1):
+            writer.writerow({**base, 'vehicle_index': index if vehicle else '', **vehicle})
+
+        count += 1
+        last_position = position
+
+    return count, last_position
+
+
+def parse_position(text):
+    """Parse a watermark like "120" or "120,98,133" (one rowid per shard)"""
+    return tuple(int(part) for part in text.split(",") if part.strip())
+
+
+def format_position(position):
+    return ",".join(str(rowid) for rowid in position)
+
+
+def read_watermark(state_file):
+    if state_file and Path(state_file).exists():
+        return parse_position(Path(state_file).read_text().strip())
+    return ()
+
+
+def write_watermark(state_file, position):
+    # Write then rename so a crash never leaves a truncated state file
+    tmp = Path(f"{state_file}.tmp")
+    tmp.write_text(format_position(position))
+    tmp.replace(state_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export completed insurance surveys")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--db", help="Database path (default: survey_data.db)")
+    parser.add_argument("--after-rowid", help="Only export surveys above this survey_data rowid (comma-separated per shard)")
+    parser.add_argument("--since", help="Only export surveys completed on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--state-file", help="File holding the rowid watermark for incremental exports")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.DB_PATH = Path(args.db)
+    database.init_database()
+
+    after = parse_position(args.after_rowid) if args.after_rowid is not None else read_watermark(args.state_file)
+    since = int(datetime.strptime(args.since, "%Y-%m-%d").timestamp() * 1000) if args.since else None
+
+    surveys = iter_completed_surveys(after=after, since=since, chunk_size=args.chunk_size)
+    exporter = export_csv if args.format == "csv" else export_jsonl
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            count, last_position = exporter(out, surveys)
+    else:
+        count, last_position = exporter(sys.stdout, surveys)
+
+    if args.state_file and last_position is not None:
+        write_watermark(args.state_file, last_position)
+
+    watermark = format_position(last_position or after) or "0"
+    print(f"Exported {count} surveys (watermark rowid: {watermark})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
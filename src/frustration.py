@@ -1,40 +1,148 @@
-import requests
+import json
+import os
+import re
 
-def check_for_frustration(user_input):
+from src.quote_pool import get_quote_pool
+
+# Phrase -> weight. One message (or the decaying per-session total) reaching
+# FRUSTRATION_THRESHOLD counts as frustration. Override with set_lexicon() or
+# a JSON file named by FRUSTRATION_LEXICON_FILE.
+FRUSTRATION_LEXICON = {
+    'frustrated': 1.0, 'angry': 1.0, 'annoyed': 1.0, 'upset': 0.8, 'irritated': 1.0,
+    'speak to human': 1.0, 'speak to a human': 1.0, 'talk to human': 1.0, 'talk to a human': 1.0,
+    'human': 0.5, 'real person': 1.0, 'agent': 0.5, 'representative': 0.8, 'help': 0.3,
+    'this is not working': 1.0, 'i give up': 1.0, 'forget it': 0.8, 'never mind': 0.6,
+    'this sucks': 1.0, 'terrible': 0.6, 'awful': 0.6, 'useless': 0.8, 'stop': 0.5, 'quit': 0.6,
+}
+
+# Asking for a person or to end the survey always counts, however it is phrased
+ESCALATION_PHRASES = [
+    f"{verb} {who}"
+    for verb in ('speak to', 'talk to', 'speak with', 'talk with')
+    for who in ('an agent', 'agent', 'a representative', 'representative', 'a rep', 'someone',
+                'somebody', 'a person', 'a real person', 'a human', 'human', 'a live person')
+] + [
+    'i want to stop', 'i want to quit', 'i wanna stop', 'i wanna quit', 'please stop',
+    'i quit', 'stop asking', 'stop this', 'let me out',
+]
+FRUSTRATION_LEXICON.update({phrase: 1.0 for phrase in ESCALATION_PHRASES})
+
+FRUSTRATION_THRESHOLD = 1.0
+
+# Share of the previous score carried into the next turn
+SCORE_DECAY = 0.6
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+def _trie_pattern(node):
+    """Regex for a character trie, so matching cost barely grows with the lexicon"""
+    is_end = '' in node
+    branches = []
+    for char, child in sorted((char, child) for char, child in node.items() if char):
+        # Phrase words may be separated by any run of whitespace
+        branches.append((r"\s+" if char == " " else re.escape(char)) + _trie_pattern(child))
+
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if is_end:
+        return "(?:" + body + ")?"
+    return body
+
+
+class FrustrationMatcher:
     """
-    Check if user is frustrated or wants to speak to a human
+    All lexicon phrases compiled into one word-bounded regex, so a message is
+    scanned once. "help" does not match "helpful" and "stop" does not match
+    "stopped". A message that is nothing but a phrase ("stop", "agent") always
+    counts as a full match.
+    """
+
+    def __init__(self, lexicon):
+        self.lexicon = {_normalize(phrase): weight for phrase, weight in lexicon.items()}
+
+        trie = {}
+        for phrase in self.lexicon:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        self.pattern = re.compile(r"(?<!\w)(?:" + _trie_pattern(trie) + r")(?!\w)")
+
+    def score(self, text):
+        """(score, matched phrases) for one message; each phrase counts once"""
+        text = _normalize(text)
+        if text.rstrip("!.?") in self.lexicon:
+            return max(FRUSTRATION_THRESHOLD, self.lexicon[text.rstrip("!.?")]), [text.rstrip("!.?")]
+
+        matched = []
+        for match in self.pattern.finditer(text):
+            phrase = _normalize(match.group())
+            if phrase not in matched:
+                matched.append(phrase)
+        return sum(self.lexicon[phrase] for phrase in matched), matched
+
+
+class FrustrationScore:
+    """Per-session rolling frustration score (mild complaints add up across turns)"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def add(self, score):
+        self.value = self.value * SCORE_DECAY + score
+        return self.value
+
+    def reset(self):
+        self.value = 0.0
+
+
+def _load_lexicon():
+    path = os.getenv("FRUSTRATION_LEXICON_FILE")
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Could not load frustration lexicon {path}: {e}")
+    return FRUSTRATION_LEXICON
+
+
+_matcher = FrustrationMatcher(_load_lexicon())
+
+
+def set_lexicon(lexicon):
+    """Replace the phrase -> weight lexicon used by check_for_frustration"""
+    global _matcher
+    _matcher = FrustrationMatcher(lexicon)
+
+
+def check_for_frustration(user_input, session_score=None):
+    """
+    Check if user is frustrated or wants to speak to a human.
+    With a FrustrationScore, scores below the threshold accumulate across turns.
     Returns: (is_frustrated, detected_reason)
     """
-    frustration_keywords = [
-        'frustrated', 'angry', 'annoyed', 'upset', 'irritated',
-        'speak to human', 'talk to human', 'human', 'real person',
-        'agent', 'representative', 'help', 'this is not working',
-        'i give up', 'forget it', 'never mind', 'this sucks',
-        'terrible', 'awful', 'useless', 'stop', 'quit'
-    ]
-    
-    user_lower = user_input.lower()
-    for keyword in frustration_keywords:
-        if keyword in user_lower:
-            return True, keyword
-    
+    score, matched = _matcher.score(user_input)
+    total = session_score.add(score) if session_score is not None else score
+
+    if total >= FRUSTRATION_THRESHOLD:
+        if session_score is not None:
+            session_score.reset()
+        # Report the heaviest phrase, as the old keyword check reported its keyword
+        return True, max(matched, key=_matcher.lexicon.get) if matched else None
+
     return False, None
 
 
 def get_zen_quote():
     """
-    Call the ZenQuotes API to get a quote when user is frustrated
+    Get a ZenQuotes quote when user is frustrated (from the prefetched pool,
+    never blocking on the API)
     """
-    try:
-        response = requests.get("https://zenquotes.io/api/random", timeout=10)
-        
-        if response.status_code == 200:
-            quotes = response.json()
-            if quotes and len(quotes) > 0:
-                quote = quotes[0]
-                return f"Here's something to brighten your day:\n\n\"{quote['q']}\"\n- {quote['a']}\n\nWould you like to continue with the survey or would you prefer to stop here?"
-        
-        return "I understand you'd like to speak with someone. Would you like to continue with the survey or stop here?"
-    
-    except Exception as e:
-        return "I understand you'd like to speak with someone. Would you like to continue with the survey or stop here?"
\ No newline at end of file
+    quote = get_quote_pool().take()
+    return f"Here's something to brighten your day:\n\n\"{quote['q']}\"\n- {quote['a']}\n\nWould you like to continue with the survey or would you prefer to stop here?"
\ No newline at end of file
@@ -0,0 +1,236 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Per-host (connect timeout, read timeout, retries, total budget in seconds for
+# all attempts); unknown hosts use DEFAULT_HOST_SETTINGS. vPIC calls sit inside
+# the validation turn deadline (VALIDATION_DEADLINE_SECONDS, 25 s), and the
+# vehicle check can make two of them, so each must give up well before that.
+HOST_SETTINGS = {
+    'vpic.nhtsa.dot.gov': {'connect_timeout': 3.05, 'read_timeout': 8, 'retries': 2, 'budget': 10},
+    'zenquotes.io': {'connect_timeout': 2, 'read_timeout': 3, 'retries': 1, 'budget': 6},
+}
+DEFAULT_HOST_SETTINGS = {'connect_timeout': 3.05, 'read_timeout': 10, 'retries': 1, 'budget': 15}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 2.0
+
+# Consecutive failed requests before a host's circuit opens, and how long it stays open
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30
+
+POOL_MAXSIZE = 10
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without a network call while a host's circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated errors from one host. After reset_timeout one
+    trial request is let through; success closes the circuit, failure
+    re-opens it.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._trial_thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_thread = threading.get_ident()
+                return True
+            return False
+
+    def release_trial(self):
+        """
+        Free the half-open trial slot if this thread holds it and the request
+        ended without recording a result (e.g. an exception from a hook or a
+        KeyboardInterrupt), so the next request can try again.
+        """
+        with self._lock:
+            if self._trial_in_flight and self._trial_thread == threading.get_ident():
+                self._trial_in_flight = False
+                self._trial_thread = None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP client: one keep-alive requests.Session, per-host
+    timeouts, bounded retries with jittered backoff, a circuit breaker per
+    host and latency/error counters.
+    """
+
+    def __init__(self, host_settings=None, pool_maxsize=POOL_MAXSIZE):
+        self.host_settings = {**HOST_SETTINGS, **(host_settings or {})}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.host_settings) + 4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _settings(self, host):
+        return self.host_settings.get(host, DEFAULT_HOST_SETTINGS)
+
+    def _breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def _count(self, host, counter, latency_ms=None):
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                'requests': 0, 'errors': 0, 'retries': 0, 'short_circuits': 0,
+                'total_latency_ms': 0.0, 'max_latency_ms': 0.0
+            })
+            stats[counter] += 1
+            if latency_ms is not None:
+                stats['total_latency_ms'] += latency_ms
+                stats['max_latency_ms'] = max(stats['max_latency_ms'], latency_ms)
+
+    def request(self, method, url, timeout=None, retries=None, budget=None, **kwargs):
+        """
+        Send a request, retrying connection errors and 429/5xx responses.
+        A read timeout is not retried: the host is up but too slow, and
+        asking again would only wait as long a second time. No attempt runs
+        past the host's total budget. Returns the last response (callers
+        check status_code) or raises the last requests exception. Raises
+        CircuitOpenError immediately while the host is marked unhealthy.
+        """
+        host = urlsplit(url).hostname
+        settings = self._settings(host)
+        connect_timeout, read_timeout = timeout or (settings['connect_timeout'], settings['read_timeout'])
+        retries = settings['retries'] if retries is None else retries
+        budget = settings['budget'] if budget is None else budget
+        breaker = self._breaker(host)
+
+        if not breaker.allow():
+            self._count(host, 'short_circuits')
+            raise CircuitOpenError(f"{host} is unavailable (circuit open)")
+
+        try:
+            return self._send(host, breaker, method, url, connect_timeout, read_timeout, retries, budget, **kwargs)
+        finally:
+            breaker.release_trial()
+
+    def _send(self, host, breaker, method, url, connect_timeout, read_timeout, retries, budget, **kwargs):
+        deadline = time.monotonic() + budget
+        for attempt in range(retries + 1):
+            if attempt:
+                # Full jitter keeps retrying clients from hitting the host in lockstep
+                time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+                if deadline - time.monotonic() < 1:
+                    break
+                self._count(host, 'retries')
+
+            remaining = deadline - time.monotonic()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, timeout=(min(connect_timeout, remaining), min(read_timeout, remaining)), **kwargs
+                )
+                error = None
+            except requests.RequestException as e:
+                response, error = None, e
+            self._count(host, 'requests', (time.perf_counter() - started) * 1000)
+
+            if error is None and response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+            if isinstance(error, requests.ReadTimeout):
+                break
+
+        self._count(host, 'errors')
+        breaker.record_failure()
+
+        if error is not None:
+            raise error
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Per-host request/error/retry counts, latency and circuit state"""
+        with self._lock:
+            stats = {}
+            for host, counters in self._stats.items():
+                breaker = self._breakers.get(host)
+                stats[host] = {
+                    **counters,
+                    'avg_latency_ms': counters['total_latency_ms'] / counters['requests'] if counters['requests'] else 0.0,
+                    'circuit': breaker.state if breaker else 'closed'
+                }
+            return stats
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client shared by all outbound API calls"""
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_client().post(url, **kwargs)
+
+
+def get_http_stats():
+    return get_client().stats()
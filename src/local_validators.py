@@ -0,0 +1,155 @@
+import re
+import threading
+
+# Words that flip the meaning of a choice ("not for business"); such answers go to the LLM
+NEGATIONS = {'not', 'no', 'never', "don't", 'dont', "isn't", 'isnt', "doesn't", 'doesnt', 'without', 'except'}
+
+WORD_NUMBERS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+
+# 12,000 / 12000 / 12.5 / 12k, with an optional minus sign so -3 fails the range check
+NUMBER_PATTERN = re.compile(r"(?<![\w.])([-−])?(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(k)?(?![\w])", re.IGNORECASE)
+
+ACCEPT_MESSAGE = "Got it!"
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def _normalize(text):
+    """Lowercase, strip punctuation at the edges and collapse whitespace"""
+    return " ".join(text.lower().strip().strip("!.?,;:").split())
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def _parse_regex(user_input, spec):
+    """Accept when the pattern finds exactly one distinct value; reject on reject_pattern"""
+    values = {match.group(1) if match.groups() else match.group()
+              for match in re.finditer(spec['pattern'], user_input)}
+    if len(values) == 1:
+        return True, values.pop()
+    if spec.get('reject_pattern') and re.fullmatch(spec['reject_pattern'], user_input.strip()):
+        return False, None
+    return None
+
+
+def _parse_choice(user_input, spec):
+    """Accept when the answer names exactly one choice (by any of its synonyms)"""
+    text = _normalize(user_input)
+
+    # A bare synonym ("yep", "Commercial") is always confident
+    for value, synonyms in spec['choices'].items():
+        if text in synonyms:
+            return True, value
+
+    if spec.get('exact_only'):
+        return None
+
+    words = _words(text)
+    if NEGATIONS & set(words):
+        return None
+
+    padded = f" {' '.join(words)} "
+    found = {value for value, synonyms in spec['choices'].items()
+             if any(f" {synonym} " in padded for synonym in synonyms)}
+    if len(found) == 1:
+        return True, found.pop()
+    return None
+
+
+def _parse_number(user_input, spec):
+    """
+    Accept a single number within [min, max]. Outside the range it is
+    rejected if the range is strict, otherwise left to the LLM.
+    """
+    text = _normalize(user_input)
+    numbers = []
+    for match in NUMBER_PATTERN.finditer(text):
+        value = float(match.group(2).replace(",", ""))
+        if match.group(3):
+            value *= 1000
+        if match.group(1):
+            value = -value
+        numbers.append(value)
+    numbers += [WORD_NUMBERS[word] for word in _words(text) if word in WORD_NUMBERS]
+
+    if len(numbers) != 1:
+        return None
+
+    value = numbers[0]
+    if spec.get('integer') and value != int(value):
+        return None
+
+    if spec['min'] <= value <= spec['max']:
+        return True, str(int(value)) if value == int(value) else str(value)
+    if spec.get('strict'):
+        return False, None
+    return None
+
+
+PARSERS = {
+    'regex': _parse_regex,
+    'choice': _parse_choice,
+    'number': _parse_number,
+}
+
+
+def _count(question_id, outcome):
+    with _lock:
+        counters = _stats.setdefault(question_id, {'accepted': 0, 'rejected': 0, 'llm': 0})
+        counters[outcome] += 1
+
+
+def validate_locally(user_input, question):
+    """
+    Settle clear-cut answers with the question's localValidator (see
+    src/questions.py) without calling the LLM.
+    Returns a validate_answer-style result, or None if the LLM should decide.
+    """
+    spec = question.get('localValidator')
+    parsed = PARSERS[spec['type']](user_input, spec) if spec else None
+
+    if parsed is None:
+        _count(question['id'], 'llm')
+        return None
+
+    is_valid, value = parsed
+    if is_valid:
+        _count(question['id'], 'accepted')
+        return {
+            "isValid": True,
+            "extractedValue": value,
+            "feedbackMessage": ACCEPT_MESSAGE,
+            "nextAction": "accept",
+            "source": "local"
+        }
+
+    _count(question['id'], 'rejected')
+    return {
+        "isValid": False,
+        "extractedValue": None,
+        "feedbackMessage": question['retryPrompt'],
+        "nextAction": "reask",
+        "source": "local"
+    }
+
+
+def get_local_validation_stats():
+    """Per-question local accept/reject/LLM counts and the share of turns settled locally"""
+    with _lock:
+        by_question = {question_id: dict(counters) for question_id, counters in _stats.items()}
+
+    local = sum(counters['accepted'] + counters['rejected'] for counters in by_question.values())
+    total = local + sum(counters['llm'] for counters in by_question.values())
+
+    return {
+        'by_question': by_question,
+        'turns': total,
+        'resolved_locally': local,
+        'local_rate': local / total if total else 0.0
+    }
@@ -1,79 +1,236 @@
+import os
+import re
+import threading
+
 import requests
 
+from src import http_client
+from src.api_cache import ApiCache
+from src.vin import clean_vin, validate_vin, predecode
+from src.vpic_index import get_index, match_model, split_make_model, api_make_name
+
+# Decoded VINs never change; failed lookups are retried sooner in case vPIC catches up
+VIN_TTL = 30 * 24 * 3600
+INVALID_VIN_TTL = 24 * 3600
+MODELS_TTL = 7 * 24 * 3600
+NO_MODELS_TTL = 24 * 3600
+
+# vPIC accepts at most 50 VINs per DecodeVINValuesBatch request
+BATCH_DECODE_SIZE = 50
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _response_cache():
+    """
+    Shared cache of vPIC responses, persisted to NHTSA_CACHE_DB
+    (default nhtsa_cache.db; set it empty to keep the cache in memory only).
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = ApiCache(os.getenv("NHTSA_CACHE_DB", "nhtsa_cache.db") or None)
+        return _cache
+
+
+def get_nhtsa_cache_stats():
+    """Hit/miss counters of the vPIC response cache"""
+    return _response_cache().stats()
+
+
+def _offline_vin_result(vin, error_message):
+    """Year and make from the VIN itself when the API can't answer"""
+    vehicle_info = predecode(vin)
+    if vehicle_info:
+        return True, vehicle_info
+    return False, error_message
+
+
 def validate_vin_with_nhtsa(vin):
     """
-    Validate VIN using NHTSA API
+    Validate VIN using NHTSA API. Malformed VINs are rejected locally, and
+    year + make are decoded offline if the API is unavailable.
     Returns: (is_valid, vehicle_info_or_error_message)
     """
+    vin = clean_vin(vin)
+    is_valid, error_message = validate_vin(vin)
+    if not is_valid:
+        return False, error_message
+
+    cached = _response_cache().get('vin', vin)
+    if cached is not None:
+        return tuple(cached)
+
     try:
         url = f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVin/{vin}?format=json"
-        response = requests.get(url, timeout=10)
-        
+        response = http_client.get(url)
+
         if response.status_code != 200:
-            return False, "Unable to validate VIN at this time."
-        
+            return _offline_vin_result(vin, "Unable to validate VIN at this time.")
+
         data = response.json()
         results = data.get('Results', [])
-        
-        error_codes = [r for r in results if r.get('Variable') == 'Error Code']
-        if error_codes and error_codes[0].get('Value') not in ['0', '']:
-            error_text = [r for r in results if r.get('Variable') == 'Error Text']
-            if error_text:
-                return False, f"Invalid VIN: {error_text[0].get('Value', 'VIN not found')}"
-            return False, "This VIN does not appear to be valid."
-        
-        make = next((r['Value'] for r in results if r.get('Variable') == 'Make'), None)
-        model = next((r['Value'] for r in results if r.get('Variable') == 'Model'), None)
-        year = next((r['Value'] for r in results if r.get('Variable') == 'Model Year'), None)
-        body_type = next((r['Value'] for r in results if r.get('Variable') == 'Body Class'), None)
-        
-        if not make or not model or not year:
-            return False, "Unable to verify this VIN. Please provide Year, Make, and Model instead."
-        
-        vehicle_info = f"{year} {make} {model}"
-        if body_type:
-            vehicle_info += f" ({body_type})"
-        
-        return True, vehicle_info
-        
+
+        # DecodeVin returns one {Variable, Value} row per field
+        values = {r.get('Variable'): r.get('Value') for r in results}
+        return _decoded_vin_result(
+            vin, values.get('Error Code'), values.get('Error Text'), values.get('Make'),
+            values.get('Model'), values.get('Model Year'), values.get('Body Class')
+        )
+
     except requests.Timeout:
-        return False, "Request timed out. Please try again."
+        return _offline_vin_result(vin, "Request timed out. Please try again.")
     except Exception as e:
-        return False, "Unable to validate VIN at this time."
+        return _offline_vin_result(vin, "Unable to validate VIN at this time.")
+
+
+def _decoded_vin_result(vin, error_code, error_text, make, model, year, body_type):
+    """Turn decoded vPIC fields into (is_valid, message) and cache it"""
+    if error_code not in [None, '0', '']:
+        if error_text:
+            result = (False, f"Invalid VIN: {error_text}")
+        else:
+            result = (False, "This VIN does not appear to be valid.")
+        _response_cache().set('vin', vin, result, INVALID_VIN_TTL)
+        return result
+
+    if not make or not model or not year:
+        result = (False, "Unable to verify this VIN. Please provide Year, Make, and Model instead.")
+        _response_cache().set('vin', vin, result, INVALID_VIN_TTL)
+        return result
+
+    vehicle_info = f"{year} {make} {model}"
+    if body_type:
+        vehicle_info += f" ({body_type})"
+
+    _response_cache().set('vin', vin, (True, vehicle_info), VIN_TTL)
+    return True, vehicle_info
+
+
+def decode_vins_batch(vins):
+    """
+    Validate several VINs with one DecodeVINValuesBatch request (per 50 VINs).
+    Local checks and the cache are applied first, so only unseen valid VINs
+    go over the network.
+    Returns: [(is_valid, vehicle_info_or_error_message)] in the order given
+    """
+    results = {}
+    to_fetch = []
+
+    for vin in vins:
+        is_valid, error_message = validate_vin(vin)
+        if not is_valid:
+            results[vin] = (False, error_message)
+            continue
+        cached = _response_cache().get('vin', vin)
+        if cached is not None:
+            results[vin] = tuple(cached)
+        elif vin not in to_fetch:
+            to_fetch.append(vin)
+
+    for start in range(0, len(to_fetch), BATCH_DECODE_SIZE):
+        chunk = to_fetch[start:start + BATCH_DECODE_SIZE]
+        try:
+            # A 50-VIN batch takes vPIC longer to answer than a single decode,
+            # but it still has to fit inside the validation turn deadline
+            response = http_client.post(
+                "https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVINValuesBatch/",
+                data={'DATA': ';'.join(chunk), 'format': 'json'},
+                timeout=(3.05, 15),
+                budget=15
+            )
+            if response.status_code != 200:
+                raise requests.RequestException(f"HTTP {response.status_code}")
+
+            # One flat row per VIN; ErrorCode may list several codes ("1,400")
+            for row in response.json().get('Results', []):
+                vin = (row.get('VIN') or '').upper()
+                if vin in chunk:
+                    error_code = (row.get('ErrorCode') or '').split(',')[0].strip()
+                    results[vin] = _decoded_vin_result(
+                        vin, error_code, row.get('ErrorText'), row.get('Make'),
+                        row.get('Model'), row.get('ModelYear'), row.get('BodyClass')
+                    )
+        except Exception as e:
+            print(f"Batch VIN decode failed: {e}")
+
+        for vin in chunk:
+            if vin not in results:
+                results[vin] = _offline_vin_result(vin, "Unable to validate VIN at this time.")
+
+    return [results[vin] for vin in vins]
+
+
+def extract_vins(user_input):
+    """VIN-shaped tokens in a message (separated by spaces, commas, semicolons or newlines)"""
+    vins = []
+    for token in re.split(r"[\s,;]+", user_input):
+        vin = clean_vin(token)
+        if len(vin) == 17 and vin.isalnum() and vin not in vins:
+            vins.append(vin)
+    return vins
+
+
+def get_models_for_make_year(make, year):
+    """
+    Model names vPIC lists for a make and model year, served from cache when possible.
+    Returns None if the API could not be reached.
+    """
+    key = f"{make.strip().lower()}|{year}"
+    cached = _response_cache().get('models', key)
+    if cached is not None:
+        return cached
+
+    url = f"https://vpic.nhtsa.dot.gov/api/vehicles/GetModelsForMakeYear/make/{make}/modelyear/{year}?format=json"
+    response = http_client.get(url)
+
+    if response.status_code != 200:
+        return None
+
+    models = [r.get('Model_Name', '') for r in response.json().get('Results', [])]
+    _response_cache().set('models', key, models, MODELS_TTL if models else NO_MODELS_TTL)
+    return models
 
 
 def validate_year_make_model_with_nhtsa(year, make, model=None):
     """
-    Validate Year/Make/Model using NHTSA API
+    Validate Year/Make/Model against the offline vPIC snapshot, falling back
+    to the NHTSA API for years or makes the snapshot does not cover.
     Returns: (is_valid, vehicle_info_or_error_message)
     """
     try:
-        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/GetModelsForMakeYear/make/{make}/modelyear/{year}?format=json"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code != 200:
-            return False, "Unable to validate vehicle at this time."
-        
-        data = response.json()
-        results = data.get('Results', [])
-        
-        if not results:
-            return False, f"I couldn't find any {year} {make} vehicles. Please check the year and make and try again."
-        
+        index = get_index()
+        found = index.find_make(year, make) if index is not None and index.has_year(year) else None
+
+        if found is not None:
+            make_name, results = found
+        else:
+            # A make missing from the snapshot is unknown, not wrong: ask vPIC
+            make_name = api_make_name(make)
+            results = get_models_for_make_year(make_name, year)
+
+            if results is None:
+                return False, "Unable to validate vehicle at this time."
+
+            if not results:
+                suggestions = index.suggest_makes(year, make) if index is not None else []
+                if suggestions:
+                    return False, f"I couldn't find any {year} {make} vehicles. Did you mean: {', '.join(suggestions)}?"
+                return False, f"I couldn't find any {year} {make} vehicles. Please check the year and make and try again."
+
         if model:
-            model_lower = model.lower()
-            matching_models = [r for r in results if model_lower in r.get('Model_Name', '').lower()]
-            
-            if not matching_models:
-                available_models = [r.get('Model_Name') for r in results[:5]]
-                models_str = ", ".join(available_models)
+            validated_model = match_model(model, results)
+
+            if not validated_model:
+                models_str = ", ".join(results[:5])
                 return False, f"I couldn't find a {year} {make} {model}. Did you mean one of these: {models_str}?"
-            
-            validated_model = matching_models[0]['Model_Name']
-            return True, f"{year} {make} {validated_model}"
+
+            return True, f"{year} {make_name} {validated_model}"
         else:
-            return True, f"{year} {make}"
-        
+            return True, f"{year} {make_name}"
+
     except requests.Timeout:
         return False, "Request timed out. Please try again."
     except Exception as e:
@@ -88,21 +245,45 @@ def parse_and_validate_vehicle(user_input):
     cleaned_input = user_input.strip().replace('-', '').replace(' ', '')
     if len(cleaned_input) == 17 and cleaned_input.isalnum():
         return validate_vin_with_nhtsa(cleaned_input)
-    
+
     parts = user_input.replace(',', ' ').split()
     parts = [p.strip() for p in parts if p.strip()]
-    
+
     if len(parts) < 2:
         return False, "Please provide either a VIN or at least the Year and Make of your vehicle."
-    
+
     try:
         year = int(parts[0])
         if year < 1900 or year > 2026:
             return False, f"{year} doesn't seem like a valid year. Please provide a year between 1900-2026."
     except ValueError:
         return False, "Please start with the year (e.g., '2020 Honda Civic')."
-    
-    make = parts[1]
-    model = ' '.join(parts[2:]) if len(parts) > 2 else None
-    
-    return validate_year_make_model_with_nhtsa(year, make, model)
\ No newline at end of file
+
+    # Makes can be several words ("Land Rover Defender")
+    index = get_index()
+    make, model = split_make_model(parts[1:], index.makes if index else ())
+
+    return validate_year_make_model_with_nhtsa(year, make, model)
+
+
+def parse_and_validate_vehicles(user_input):
+    """
+    Like parse_and_validate_vehicle, but a message may list several VINs
+    (e.g. a fleet), which are decoded with a single batch request.
+    Returns: (vehicle_infos, error_messages)
+    """
+    vins = extract_vins(user_input)
+
+    if len(vins) < 2:
+        is_valid, message = parse_and_validate_vehicle(user_input)
+        return ([message], []) if is_valid else ([], [message])
+
+    vehicles = []
+    errors = []
+    for vin, (is_valid, message) in zip(vins, decode_vins_batch(vins)):
+        if is_valid:
+            vehicles.append(message)
+        else:
+            errors.append(f"{vin}: {message}")
+
+    return vehicles, errors
\ No newline at end of file
@@ -1,3 +1,20 @@
+# Local fast-path validators (src/local_validators.py): confident answers are
+# settled without the LLM; anything ambiguous still goes to the LLM.
+# "pii": True keeps a question's answers out of the LLM response cache (src/validators.py).
+# The LLM reply schema types extractedValue from localValidator; "valueSchema" overrides it.
+# "llmTier" ("small"/"large") and "maxTokens" pick the model and reply cap (src/validators.py);
+# small-tier answers that are invalid or low-confidence are escalated to the large tier.
+YES_NO_VALIDATOR = {
+    "type": "choice",
+    "exact_only": True,
+    "choices": {
+        "yes": ["yes", "y", "yeah", "yep", "yup", "ya", "sure", "ok", "okay", "of course",
+                "absolutely", "definitely", "correct", "yes please", "i do", "it does", "it is"],
+        "no": ["no", "n", "nope", "nah", "not really", "no thanks", "no thank you", "negative",
+               "i don't", "it doesn't", "it isn't", "none"]
+    }
+}
+
 questions = [
     {
         "id": "zip_code",
@@ -5,7 +22,14 @@ questions = [
         "expectedFormat": "5-digit US zip code",
         "validationRules": "Must be exactly 5 digits",
         "retryPrompt": "Please provide a valid 5-digit zip code.",
-        "conditional": None
+        "conditional": None,
+        "llmTier": "small",
+        "maxTokens": 120,
+        "localValidator": {
+            "type": "regex",
+            "pattern": r"(?<!\d)(\d{5})(?:-\d{4})?(?!\d)",
+            "reject_pattern": r"\d{1,4}|\d{6,8}"
+        }
     },
     {
         "id": "full_name",
@@ -13,7 +37,10 @@ questions = [
         "expectedFormat": "First and Last name",
         "validationRules": "Must contain at least 2-50 characters",
         "retryPrompt": "Please provide your full name (first and last).",
-        "conditional": None
+        "conditional": None,
+        "llmTier": "large",
+        "maxTokens": 150,
+        "pii": True
     },
     {
         "id": "email",
@@ -21,7 +48,15 @@ questions = [
         "expectedFormat": "valid email format (user@domain.com)",
         "validationRules": "Must be a valid email format",
         "retryPrompt": "That doesn't look like a valid email. Please provide a valid email address.",
-        "conditional": None
+        "conditional": None,
+        "llmTier": "small",
+        "maxTokens": 120,
+        "pii": True,
+        "localValidator": {
+            "type": "regex",
+            "pattern": r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+            "reject_pattern": r"[^\s@]*@[^\s@]*|[^\s@]+\.[^\s@]+"
+        }
     },
     {
         "id": "add_vehicle_prompt",
@@ -30,7 +65,10 @@ questions = [
         "validationRules": "Must be yes or no",
         "retryPrompt": "Please answer yes or no.",
         "conditional": None,
-        "type": "vehicle_start"
+        "llmTier": "small",
+        "maxTokens": 120,
+        "type": "vehicle_start",
+        "localValidator": YES_NO_VALIDATOR
     },
     {
         "id": "vehicle_identifier",
@@ -39,6 +77,8 @@ questions = [
         "validationRules": "Either a 17-character VIN or Year (4 digits) + Make + Model",
         "retryPrompt": "Please provide either a VIN or the year, make, and model of your vehicle.",
         "conditional": {"type": "vehicle_question"},
+        "llmTier": "large",
+        "maxTokens": 20,
         "vehicle_question": True
     },
     {
@@ -48,7 +88,18 @@ questions = [
         "validationRules": "Must be exactly one of these: commuting, commercial, farming, business",
         "retryPrompt": "Please choose one: commuting, commercial, farming, or business.",
         "conditional": {"type": "vehicle_question"},
-        "vehicle_question": True
+        "llmTier": "small",
+        "maxTokens": 120,
+        "vehicle_question": True,
+        "localValidator": {
+            "type": "choice",
+            "choices": {
+                "commuting": ["commuting", "commute", "commuter", "commutes"],
+                "commercial": ["commercial"],
+                "farming": ["farming", "farm", "agriculture", "agricultural"],
+                "business": ["business"]
+            }
+        }
     },
     {
         "id": "blind_spot_warning",
@@ -57,7 +108,10 @@ questions = [
         "validationRules": "Must be yes or no",
         "retryPrompt": "Please answer yes or no.",
         "conditional": {"type": "vehicle_question"},
-        "vehicle_question": True
+        "llmTier": "small",
+        "maxTokens": 120,
+        "vehicle_question": True,
+        "localValidator": YES_NO_VALIDATOR
     },
     {
         "id": "commute_days_per_week",
@@ -66,7 +120,10 @@ questions = [
         "validationRules": "Must be a number between 1 and 7",
         "retryPrompt": "Please provide a number between 1 and 7.",
         "conditional": {"field": "vehicle_use", "value": "commuting"},
-        "vehicle_question": True
+        "llmTier": "small",
+        "maxTokens": 120,
+        "vehicle_question": True,
+        "localValidator": {"type": "number", "integer": True, "min": 1, "max": 7, "strict": True}
     },
     {
         "id": "commute_one_way_miles",
@@ -75,7 +132,10 @@ questions = [
         "validationRules": "Must be a positive number, typically between 1-200",
         "retryPrompt": "Please provide the one-way distance in miles.",
         "conditional": {"field": "vehicle_use", "value": "commuting"},
-        "vehicle_question": True
+        "llmTier": "small",
+        "maxTokens": 120,
+        "vehicle_question": True,
+        "localValidator": {"type": "number", "min": 1, "max": 200}
     },
     {
         "id": "annual_mileage",
@@ -84,7 +144,10 @@ questions = [
         "validationRules": "Must be a positive number, typically between 1,000-200,000",
         "retryPrompt": "Please provide the annual mileage.",
         "conditional": {"field": "vehicle_use", "value": ["commercial", "farming", "business"]},
-        "vehicle_question": True
+        "llmTier": "small",
+        "maxTokens": 120,
+        "vehicle_question": True,
+        "localValidator": {"type": "number", "integer": True, "min": 1000, "max": 200000}
     },
     {
         "id": "add_another_vehicle",
@@ -93,8 +156,11 @@ questions = [
         "validationRules": "Must be yes or no",
         "retryPrompt": "Please answer yes or no.",
         "conditional": {"type": "vehicle_question"},
+        "llmTier": "small",
+        "maxTokens": 120,
         "type": "vehicle_end",
-        "vehicle_question": True
+        "vehicle_question": True,
+        "localValidator": YES_NO_VALIDATOR
     },
     {
         "id": "license_type",
@@ -102,7 +168,17 @@ questions = [
         "expectedFormat": "one of: Foreign, Personal, Commercial",
         "validationRules": "Must be exactly one of these: Foreign, Personal, Commercial",
         "retryPrompt": "Please choose one: Foreign, Personal, or Commercial.",
-        "conditional": None
+        "conditional": None,
+        "llmTier": "small",
+        "maxTokens": 120,
+        "localValidator": {
+            "type": "choice",
+            "choices": {
+                "Foreign": ["foreign", "international"],
+                "Personal": ["personal"],
+                "Commercial": ["commercial", "cdl"]
+            }
+        }
     },
     {
         "id": "license_status",
@@ -110,6 +186,15 @@ questions = [
         "expectedFormat": "Valid or Suspended",
         "validationRules": "Must be either Valid or Suspended",
         "retryPrompt": "Please answer Valid or Suspended.",
-        "conditional": None  
+        "conditional": None,
+        "llmTier": "small",
+        "maxTokens": 120,
+        "localValidator": {
+            "type": "choice",
+            "choices": {
+                "Valid": ["valid", "active", "current"],
+                "Suspended": ["suspended"]
+            }
+        }
     }
 ]
\ No newline at end of file
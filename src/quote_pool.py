@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+from collections import deque
+
+from src import http_client
+
+# ZenQuotes' bulk endpoint returns 50 quotes per call
+QUOTES_URL = "https://zenquotes.io/api/quotes"
+
+# Refill in the background once fewer than this many quotes are left
+LOW_WATER = 10
+
+# ZenQuotes allows 5 calls per 30 s per IP, shared by every process on our egress
+MIN_REFILL_INTERVAL = 60
+
+# Served whenever the pool is empty (first start, API down or rate limited)
+OFFLINE_QUOTES = [
+    {'q': "The journey of a thousand miles begins with one step.", 'a': "Lao Tzu"},
+    {'q': "It does not matter how slowly you go as long as you do not stop.", 'a': "Confucius"},
+    {'q': "Adopt the pace of nature: her secret is patience.", 'a': "Ralph Waldo Emerson"},
+    {'q': "The best way out is always through.", 'a': "Robert Frost"},
+    {'q': "Rivers know this: there is no hurry. We shall get there some day.", 'a': "A. A. Milne"},
+    {'q': "Act as if what you do makes a difference. It does.", 'a': "William James"},
+    {'q': "Believe you can and you're halfway there.", 'a': "Theodore Roosevelt"},
+    {'q': "Fall seven times, stand up eight.", 'a': "Japanese Proverb"},
+    {'q': "Start where you are. Use what you have. Do what you can.", 'a': "Arthur Ashe"},
+    {'q': "With the new day comes new strength and new thoughts.", 'a': "Eleanor Roosevelt"},
+    {'q': "Well done is better than well said.", 'a': "Benjamin Franklin"},
+    {'q': "Keep your face always toward the sunshine, and shadows will fall behind you.", 'a': "Walt Whitman"},
+    {'q': "Happiness is not something ready made. It comes from your own actions.", 'a': "Dalai Lama"},
+    {'q': "Everything you can imagine is real.", 'a': "Pablo Picasso"},
+    {'q': "This too shall pass.", 'a': "Persian Proverb"},
+    {'q': "What we think, we become.", 'a': "Buddha"},
+]
+
+
+class QuotePool:
+    """
+    In-memory pool of quotes, filled in bulk from ZenQuotes on a background
+    thread. take() never touches the network: it pops a prefetched quote or,
+    if none are left, picks one from OFFLINE_QUOTES.
+    """
+
+    def __init__(self, url=QUOTES_URL, low_water=LOW_WATER, min_refill_interval=MIN_REFILL_INTERVAL):
+        self.url = url
+        self.low_water = low_water
+        self.min_refill_interval = min_refill_interval
+        self._quotes = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._last_refill = None
+        self.served_online = 0
+        self.served_offline = 0
+
+    def take(self):
+        """A quote dict ({'q': text, 'a': author}) in constant time"""
+        with self._lock:
+            quote = self._quotes.popleft() if self._quotes else None
+            if quote:
+                self.served_online += 1
+            else:
+                self.served_offline += 1
+            low = len(self._quotes) < self.low_water
+
+        if low:
+            self.refill_async()
+        return quote or random.choice(OFFLINE_QUOTES)
+
+    def refill_async(self):
+        """Start a background refill unless one is running or the last was too recent"""
+        with self._lock:
+            recent = self._last_refill is not None and time.monotonic() - self._last_refill < self.min_refill_interval
+            if self._refilling or recent:
+                return
+            self._refilling = True
+            self._last_refill = time.monotonic()
+
+        threading.Thread(target=self._refill, name="quote-pool-refill", daemon=True).start()
+
+    def _refill(self):
+        try:
+            response = http_client.get(self.url)
+            if response.status_code == 200:
+                # Rate-limited responses come back as a single "quote" from zenquotes.io
+                quotes = [
+                    {'q': quote['q'], 'a': quote['a']}
+                    for quote in response.json()
+                    if quote.get('q') and quote.get('a') and quote['a'] != 'zenquotes.io'
+                ]
+                random.shuffle(quotes)
+                with self._lock:
+                    self._quotes.extend(quotes)
+        except Exception as e:
+            print(f"Quote pool refill failed: {e}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'available': len(self._quotes),
+                'served_online': self.served_online,
+                'served_offline': self.served_offline
+            }
+
+
+_pool = QuotePool()
+
+
+def get_quote_pool():
+    """The process-wide quote pool (call refill_async() at startup to warm it)"""
+    return _pool
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 2048
+
+# How often (seconds) to poll for writes made by other processes
+EXTERNAL_CHECK_INTERVAL = 0.5
+
+
+class ReadCache:
+    """
+    LRU cache for database reads, invalidated by write generations.
+    Every entry records the generation of its scope (a session id, or None for
+    queries spanning all sessions) at load time; writers bump the generation
+    so stale entries simply stop matching. Sessions that are no longer written
+    to (e.g. completed ones) stay cached until the LRU bound evicts them, and
+    a session's generation is dropped once none of its reads are cached.
+
+    Writes from other processes (other workers, the archive/export CLIs) are
+    seen through external_version(), a callable polled at most every
+    check_interval seconds; when its value changes every entry is invalidated.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, external_version=None, check_interval=EXTERNAL_CHECK_INTERVAL):
+        self.max_entries = max_entries
+        self.external_version = external_version
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._generations = {}
+        # Cached entries and in-flight loads per session, so idle sessions can be pruned
+        self._scope_entries = {}
+        self._loading = {}
+        self._global_generation = 0
+        self._epoch = 0
+        self._external = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, scope):
+        if scope is None:
+            return self._epoch, self._global_generation
+        return self._epoch, self._generations.get(scope, 0)
+
+    def _check_external(self):
+        """Start a new epoch if another process has written since the last check"""
+        now = time.monotonic()
+        if self.external_version is None or (self._checked_at is not None and now - self._checked_at < self.check_interval):
+            return
+        self._checked_at = now
+
+        # Called without self._lock: external_version may wait on a writer
+        # connection whose holder is about to call bump()
+        version = self.external_version()
+        with self._lock:
+            if version != self._external:
+                if self._external is not None:
+                    self._epoch += 1
+                self._external = version
+
+    def bump(self, session_ids):
+        """Invalidate cached reads for these sessions and for all-session queries"""
+        with self._lock:
+            for session_id in session_ids:
+                # Nothing cached or loading for this session means nothing to invalidate
+                if session_id in self._scope_entries or session_id in self._loading:
+                    self._generations[session_id] = self._generations.get(session_id, 0) + 1
+            self._global_generation += 1
+
+    def _release(self, scope, counts):
+        counts[scope] -= 1
+        if counts[scope] == 0:
+            del counts[scope]
+            if scope not in self._scope_entries and scope not in self._loading:
+                self._generations.pop(scope, None)
+
+    def get_or_load(self, key, scope, load):
+        """Return the cached value for key, calling load() on a miss"""
+        self._check_external()
+
+        with self._lock:
+            # Read the generation before loading so a concurrent write wins
+            generation = self.generation(scope)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            if scope is not None:
+                self._loading[scope] = self._loading.get(scope, 0) + 1
+
+        try:
+            value = load()
+        except BaseException:
+            if scope is not None:
+                with self._lock:
+                    self._release(scope, self._loading)
+            raise
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None and old[0] is not None:
+                self._release(old[0], self._scope_entries)
+            self._entries[key] = (scope, generation, value)
+            if scope is not None:
+                self._scope_entries[scope] = self._scope_entries.get(scope, 0) + 1
+                self._release(scope, self._loading)
+
+            while len(self._entries) > self.max_entries:
+                _, (evicted_scope, _, _) = self._entries.popitem(last=False)
+                if evicted_scope is not None:
+                    self._release(evicted_scope, self._scope_entries)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scope_entries.clear()
+            self._generations.clear()
+            self._global_generation += 1
+            self._epoch += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'tracked_sessions': len(self._generations),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
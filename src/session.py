@@ -1,4 +1,6 @@
+import time
 from src.validators import validate_answer
+from src.frustration import FrustrationScore
 
 class InsuranceChatbotSession:
     def __init__(self, questions):
@@ -8,10 +10,16 @@ class InsuranceChatbotSession:
         self.vehicles = []
         self.current_vehicle = {}
         self.in_vehicle_flow = False
+        self.pending_vehicles = []
+        self.vehicle_batch_size = 0
         self.attempt_counts = {}
         self.max_attempts = 3
         self.conversation_history = []
         self.user_wants_to_stop = False
+        self.frustration_score = FrustrationScore()
+        self.last_turn = None
+        self.last_turn_ended_at = time.time()
+        self.turn_model_tier = None
         
     def should_ask_question(self, question):
         """Check if question should be asked based on conditional logic"""
@@ -44,6 +52,11 @@ class InsuranceChatbotSession:
         while self.current_index < len(self.questions):
             question = self.questions[self.current_index]
             
+            # Vehicles queued from a multi-VIN answer skip "add another?" and go straight to the next one
+            if question['id'] == 'add_another_vehicle' and self.pending_vehicles:
+                self.start_pending_vehicle()
+                continue
+            
             if self.should_ask_question(question):
                 return question
             else:
@@ -51,10 +64,36 @@ class InsuranceChatbotSession:
         
         return None
     
+    def question_text(self, question):
+        """Question text, labelled with the vehicle it is about while working through a batch"""
+        if self.vehicle_batch_size > 1 and question.get('vehicle_question') and question['id'] != 'add_another_vehicle':
+            position = self.vehicle_batch_size - len(self.pending_vehicles)
+            vehicle = self.current_vehicle.get('vehicle_identifier')
+            return f"**Vehicle {position} of {self.vehicle_batch_size} ({vehicle}):** {question['text']}"
+        return question['text']
+    
+    def record_turn(self, question_id, attempt, outcome):
+        """Remember the analytics event for this turn (persisted by the caller)"""
+        now = time.time()
+        self.last_turn = {
+            "question_id": question_id,
+            "attempt": attempt,
+            "outcome": outcome,
+            "elapsed_ms": int((now - self.last_turn_ended_at) * 1000),
+            "model_tier": self.turn_model_tier
+        }
+        self.last_turn_ended_at = now
+    
     def process_response(self, user_input):
+        self.last_turn = None
+        self.turn_model_tier = None
+        
         # Check if user wants to stop after frustration was detected
         if self.user_wants_to_stop:
             if 'stop' in user_input.lower() or 'no' in user_input.lower():
+                stopped_q = self.get_next_question()
+                if stopped_q:
+                    self.record_turn(stopped_q['id'], 0, "stopped")
                 return {
                     "done": True,
                     "message": "No problem! Feel free to come back anytime.",
@@ -79,10 +118,13 @@ class InsuranceChatbotSession:
         if len(self.conversation_history) > 0:
             context['recent_conversation'] = self.conversation_history[-3:]
         
-        result = validate_answer(user_input, current_q, context)
+        result = validate_answer(user_input, current_q, context, frustration_score=self.frustration_score)
+        # Which validator answered: local, cache, or the small/large LLM tier
+        self.turn_model_tier = result.get('modelTier') if result else None
         
         # Handle frustration
         if result and result.get('frustration'):
+            self.record_turn(current_q['id'], self.attempt_counts[question_key], "frustration")
             self.user_wants_to_stop = True
             return {
                 "done": False,
@@ -96,9 +138,11 @@ class InsuranceChatbotSession:
         })
         
         if not result:
+            self.record_turn(current_q['id'], self.attempt_counts[question_key], "error")
             return {"error": "API error, please try again"}
         
         if result['isValid'] and result['nextAction'] == 'accept':
+            self.record_turn(current_q['id'], self.attempt_counts[question_key], "accepted")
             self.conversation_history = []
             
             if current_q['id'] == 'add_vehicle_prompt':
@@ -111,11 +155,12 @@ class InsuranceChatbotSession:
                     if next_q:
                         return {
                             "done": False,
-                            "message": f"{result['feedbackMessage']}\n\n{next_q['text']}"
+                            "message": f"{result['feedbackMessage']}\n\n{self.question_text(next_q)}"
                         }
             
             elif current_q['id'] == 'add_another_vehicle':
                 self.vehicles.append(self.current_vehicle.copy())
+                self.vehicle_batch_size = 0
                 
                 if result['extractedValue'].lower() == 'yes':
                     self.current_vehicle = {}
@@ -124,7 +169,7 @@ class InsuranceChatbotSession:
                     if next_q:
                         return {
                             "done": False,
-                            "message": f"{result['feedbackMessage']}\n\n{next_q['text']}"
+                            "message": f"{result['feedbackMessage']}\n\n{self.question_text(next_q)}"
                         }
                 else:
                     self.in_vehicle_flow = False
@@ -132,6 +177,11 @@ class InsuranceChatbotSession:
             
             elif current_q.get('vehicle_question'):
                 self.current_vehicle[current_q['id']] = result['extractedValue']
+                
+                # Several VINs at once: the rest are queued and asked about one by one
+                if result.get('extractedValues'):
+                    self.pending_vehicles = result['extractedValues'][1:]
+                    self.vehicle_batch_size = len(result['extractedValues'])
             
             else:
                 self.answers[current_q['id']] = result['extractedValue']
@@ -149,7 +199,7 @@ class InsuranceChatbotSession:
             if next_q:
                 return {
                     "done": False,
-                    "message": f"{result['feedbackMessage']}\n\n{next_q['text']}"
+                    "message": f"{result['feedbackMessage']}\n\n{self.question_text(next_q)}"
                 }
             else:
                 return {
@@ -159,6 +209,7 @@ class InsuranceChatbotSession:
                 }
         else:
             if self.attempt_counts[question_key] >= self.max_attempts:
+                self.record_turn(current_q['id'], self.attempt_counts[question_key], "skipped")
                 self.conversation_history = []
                 self.current_index += 1
                 next_q = self.get_next_question()
@@ -166,7 +217,7 @@ class InsuranceChatbotSession:
                 if next_q:
                     return {
                         "done": False,
-                        "message": f"Let's move on.\n\n{next_q['text']}",
+                        "message": f"Let's move on.\n\n{self.question_text(next_q)}",
                         "skipped": current_q['id']
                     }
                 else:
@@ -176,6 +227,7 @@ class InsuranceChatbotSession:
                         "data": self.compile_final_data()
                     }
             
+            self.record_turn(current_q['id'], self.attempt_counts[question_key], "reask")
             return {
                 "done": False,
                 "message": result['feedbackMessage']
@@ -187,7 +239,18 @@ class InsuranceChatbotSession:
                 self.current_index = i
                 return
     
+    def start_pending_vehicle(self):
+        """Save the current vehicle and begin the follow-up questions for the next queued one"""
+        self.vehicles.append(self.current_vehicle.copy())
+        self.current_vehicle = {'vehicle_identifier': self.pending_vehicles.pop(0)}
+        self.reset_to_vehicle_start()
+        self.current_index += 1
+    
     def reset_to_vehicle_start(self):
+        # Each vehicle gets its own attempts at the vehicle questions
+        vehicle_keys = {f"{q['id']}_{i}" for i, q in enumerate(self.questions) if q.get('vehicle_question')}
+        self.attempt_counts = {key: count for key, count in self.attempt_counts.items() if key not in vehicle_keys}
+        
         for i, q in enumerate(self.questions):
             if q['id'] == 'vehicle_identifier':
                 self.current_index = i
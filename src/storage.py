@@ -0,0 +1,92 @@
+import os
+import uuid
+import zlib
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from src.db_pool import ConnectionPool
+
+
+class StorageBackend:
+    """
+    Where session data lives. A backend owns one or more connection pools
+    (shards); every session belongs to exactly one of them, and queries that
+    span sessions fan out over all of them. All shards share one schema.
+    """
+
+    pools = []
+
+    def pool_for(self, session_id):
+        """The pool holding this session's rows"""
+        raise NotImplementedError
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+
+
+class SQLiteBackend(StorageBackend):
+    """All sessions in a single SQLite file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.pools = [ConnectionPool(self.path)]
+
+    def pool_for(self, session_id):
+        return self.pools[0]
+
+
+class ShardedSQLiteBackend(StorageBackend):
+    """
+    Sessions spread across N SQLite files by a stable hash of session_id,
+    so N writers can commit in parallel.
+    """
+
+    def __init__(self, directory, shards=4):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pools = [
+            ConnectionPool(self.directory / f"survey_data_{index}.db")
+            for index in range(shards)
+        ]
+
+    def pool_for(self, session_id):
+        # crc32 rather than hash(): it must agree across processes and restarts
+        return self.pools[zlib.crc32(session_id.encode("utf-8")) % len(self.pools)]
+
+
+class MemoryBackend(StorageBackend):
+    """In-process SQLite database for tests and benchmarks; gone at exit"""
+
+    def __init__(self, name=None):
+        name = name or f"survey_data_{uuid.uuid4().hex}"
+        self.pools = [ConnectionPool(f"file:{name}?mode=memory&cache=shared", uri=True, shared_cache=True)]
+        # A shared-cache memory database only lives while a connection is open
+        self._keepalive = self.pools[0].connect()
+
+    def pool_for(self, session_id):
+        return self.pools[0]
+
+    def close(self):
+        super().close()
+        self._keepalive.close()
+
+
+def backend_from_env(default_path):
+    """
+    Build the backend selected by DB_BACKEND (sqlite, sharded or memory).
+    Sharding reads DB_SHARDS (default 4) and DB_SHARD_DIR (default survey_data_shards).
+    """
+    # Pages can run before app.py has loaded .env
+    load_dotenv()
+    kind = os.getenv("DB_BACKEND", "sqlite").lower()
+
+    if kind == "sharded":
+        return ShardedSQLiteBackend(
+            os.getenv("DB_SHARD_DIR", "survey_data_shards"),
+            shards=int(os.getenv("DB_SHARDS", "4"))
+        )
+    if kind == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(default_path)
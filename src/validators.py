@@ -1,26 +1,374 @@
+import asyncio
+import hashlib
 import json
 import os
+import re
+import threading
 import time
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from src.api_cache import ApiCache
 from src.frustration import check_for_frustration, get_zen_quote
-from src.nhtsa_api import parse_and_validate_vehicle
+from src.nhtsa_api import parse_and_validate_vehicles, extract_vins
+from src.local_validators import validate_locally, ACCEPT_MESSAGE
 
 # Load environment variables FIRST
 load_dotenv()
 
 # Initialize OpenAI client AFTER loading .env
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def validate_answer(user_input, question, context=None, max_retries=3):
+# Questions pick a tier ("llmTier" in src/questions.py). Structured outputs
+# (strict json_schema) need gpt-4o-mini / gpt-4o or later; gpt-4 can't do them.
+MODEL_TIERS = {
+    "small": os.getenv("LLM_SMALL_MODEL", "gpt-4o-mini"),
+    "large": os.getenv("LLM_LARGE_MODEL", "gpt-4o"),
+}
+DEFAULT_TIER = "large"
+DEFAULT_MAX_TOKENS = 150
+
+# Small-tier verdicts below this confidence, or invalid, are re-asked of the large tier
+ESCALATION_CONFIDENCE = 0.8
+
+# Upper bound on one validation turn, whatever stages it runs
+TURN_DEADLINE_SECONDS = float(os.getenv("VALIDATION_DEADLINE_SECONDS", "25"))
+
+# Already shaped like "2020 Honda Civic", so no LLM rewrite is needed
+YEAR_MAKE_PATTERN = re.compile(r"^\s*(19|20)\d{2}[\s,]+\S")
+
+TROUBLE_RESULT = {
+    "isValid": False,
+    "extractedValue": None,
+    "feedbackMessage": "I'm having trouble right now. Could you try again?",
+    "nextAction": "reask"
+}
+
+# Async work runs on one long-lived loop so AsyncOpenAI keeps its connection pool
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    global _loop
+    
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="validation-loop", daemon=True).start()
+        return _loop
+
+# Validated answers to the same question repeat a lot ("yes", "commuting", "12k").
+# Persisted to LLM_CACHE_DB if set; questions marked "pii" are never cached.
+# Only the verdict is cached: the LLM's feedback can quote the session's
+# context (name, earlier answers), so cache hits get fixed feedback text.
+LLM_CACHE_TTL = 7 * 24 * 3600
+llm_cache = ApiCache(os.getenv("LLM_CACHE_DB") or None)
+CACHED_VERDICT_FIELDS = ("isValid", "extractedValue", "nextAction")
+
+# Answers that point back at earlier ones ("same as before") are resolved from
+# the session's context, so the same words can mean different values
+CONTEXT_REFERENCE = re.compile(r"\b(same|previous|before|above|again|earlier|other one|last one|first one)\b")
+
+
+def _normalize_answer(user_input):
+    """Case, whitespace and trailing punctuation don't change what an answer means"""
+    return " ".join(user_input.lower().split()).strip("!.?")
+
+
+def _llm_cache_key(user_input, question):
+    """
+    Hash of the model, the question's prompt fields and the normalized answer.
+    Editing a question's wording or rules therefore starts a fresh cache, and
+    no raw answer text is stored.
+    """
+    parts = [MODEL_TIERS[_tier(question)], MODEL_TIERS["large"], question['id'], question['text'], question['expectedFormat'],
+             question['validationRules'], _normalize_answer(user_input)]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def _cacheable(user_input, question):
+    return not question.get('pii') and not CONTEXT_REFERENCE.search(user_input.lower())
+
+
+def _cached_result(verdict, question):
+    """A validate_answer result from a cached verdict, with fixed feedback"""
+    return {
+        **verdict,
+        "feedbackMessage": ACCEPT_MESSAGE if verdict['isValid'] else question['retryPrompt'],
+        "modelTier": "cache"
+    }
+
+
+def get_llm_cache_stats():
+    """Hit/miss counters of the LLM validation cache"""
+    return llm_cache.stats()
+
+
+def value_schema(question):
+    """
+    JSON schema for a question's extractedValue: an explicit "valueSchema",
+    else derived from its localValidator (choices -> enum, numbers -> number),
+    else a string. Always nullable, since invalid answers extract nothing.
+    """
+    schema = question.get('valueSchema')
+    validator = question.get('localValidator') or {}
+    
+    if schema is None and validator.get('type') == 'choice':
+        schema = {"type": "string", "enum": list(validator['choices'])}
+    elif schema is None and validator.get('type') == 'number':
+        schema = {"type": "integer" if validator.get('integer') else "number"}
+    elif schema is None:
+        schema = {"type": "string"}
+    
+    nullable = {**schema, "type": [schema['type'], "null"]}
+    if 'enum' in schema:
+        nullable['enum'] = schema['enum'] + [None]
+    return nullable
+
+
+def response_format(question):
+    """Strict structured-output schema for a validation verdict"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "validation_result",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "isValid": {"type": "boolean"},
+                    "extractedValue": value_schema(question),
+                    "feedbackMessage": {"type": "string"},
+                    "nextAction": {"type": "string", "enum": ["accept", "reask"]},
+                    "confidence": {"type": "number"}
+                },
+                "required": ["isValid", "extractedValue", "feedbackMessage", "nextAction", "confidence"],
+                "additionalProperties": False
+            }
+        }
+    }
+
+
+def _as_text(value):
+    """Typed values back to the strings the session and database store (5 -> "5")"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+# Responses received, and how many could not be used (bad JSON or a refusal), per model
+_parse_lock = threading.Lock()
+_parse_stats = {}
+
+
+def _count_parse(model, outcome):
+    with _parse_lock:
+        counters = _parse_stats.setdefault(model, {'responses': 0, 'parse_failures': 0, 'refusals': 0})
+        counters['responses'] += 1
+        if outcome:
+            counters[outcome] += 1
+
+
+def get_llm_parse_stats():
+    """Per-model response counts and parse-failure rate of LLM validation"""
+    with _parse_lock:
+        return {
+            model: {**counters, 'failure_rate': (counters['parse_failures'] + counters['refusals']) / counters['responses']}
+            for model, counters in _parse_stats.items()
+        }
+
+
+def _tier(question):
+    return question.get('llmTier', DEFAULT_TIER)
+
+
+# LLM calls, latency and escalations per tier
+_routing_lock = threading.Lock()
+_routing_stats = {}
+
+
+def _count_call(tier, counter, elapsed_ms=0.0):
+    with _routing_lock:
+        counters = _routing_stats.setdefault(tier, {'calls': 0, 'escalated': 0, 'total_ms': 0.0})
+        counters[counter] += 1
+        counters['total_ms'] += elapsed_ms
+
+
+def get_llm_routing_stats():
+    """Per-tier model, call count, mean latency and how often the tier escalated"""
+    with _routing_lock:
+        return {
+            tier: {
+                'model': MODEL_TIERS[tier],
+                'calls': counters['calls'],
+                'mean_ms': counters['total_ms'] / counters['calls'],
+                'escalation_rate': counters['escalated'] / counters['calls']
+            }
+            for tier, counters in _routing_stats.items()
+        }
+
+
+def _needs_escalation(result):
+    return result is None or not result['isValid'] or result['confidence'] < ESCALATION_CONFIDENCE
+
+def validate_answer(user_input, question, context=None, max_retries=3, frustration_score=None):
+    """
+    Synchronous wrapper around validate_answer_async for the Streamlit script
+    thread. The whole turn is cancelled after TURN_DEADLINE_SECONDS.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        asyncio.wait_for(
+            validate_answer_async(user_input, question, context, max_retries, frustration_score),
+            TURN_DEADLINE_SECONDS
+        ),
+        _event_loop()
+    )
+    try:
+        return future.result()
+    except TimeoutError:
+        print(f"Validation of {question['id']} exceeded {TURN_DEADLINE_SECONDS}s")
+        return dict(TROUBLE_RESULT)
+
+
+def _vehicle_result(vehicles, errors):
+    """validate_answer result for the NHTSA vehicle check"""
+    if len(vehicles) == 1 and not errors:
+        return {
+            "isValid": True,
+            "extractedValue": vehicles[0],
+            "feedbackMessage": f"Great! I've verified your vehicle: {vehicles[0]}",
+            "nextAction": "accept"
+        }
+    elif vehicles:
+        feedback = f"Great! I've verified {len(vehicles)} vehicles:\n" + "\n".join(f"- {v}" for v in vehicles)
+        if errors:
+            feedback += "\n\nI couldn't verify these, so I've left them out (you can add them afterwards):\n"
+            feedback += "\n".join(f"- {e}" for e in errors)
+        return {
+            "isValid": True,
+            "extractedValue": vehicles[0],
+            "extractedValues": vehicles,
+            "feedbackMessage": feedback,
+            "nextAction": "accept"
+        }
+    else:
+        return {
+            "isValid": False,
+            "extractedValue": None,
+            "feedbackMessage": "\n".join(errors),
+            "nextAction": "reask"
+        }
+
+
+async def _normalize_vehicle_with_llm(user_input, question):
+    """Rewrite a free-text vehicle description as "Year Make Model", or None"""
+    started = time.perf_counter()
+    response = await client.chat.completions.create(
+        model=MODEL_TIERS[_tier(question)],
+        messages=[
+            {"role": "system", "content": (
+                "Rewrite the user's vehicle description as 'YEAR MAKE MODEL' "
+                "(e.g. '2019 Honda Civic'). Reply with only that, or NONE if it has no year and make."
+            )},
+            {"role": "user", "content": user_input}
+        ],
+        temperature=0,
+        max_tokens=question.get('maxTokens', DEFAULT_MAX_TOKENS),
+        timeout=TURN_DEADLINE_SECONDS
+    )
+    _count_call(_tier(question), 'calls', (time.perf_counter() - started) * 1000)
+    text = (response.choices[0].message.content or "").strip().strip("'\"")
+    return None if not text or text.upper() == "NONE" else text
+
+
+async def _validate_vehicle_async(user_input, question):
+    """
+    NHTSA validation of the raw answer, with an LLM rewrite of free-text
+    descriptions ("my wife's 2019 civic") running concurrently. The rewrite
+    is only used, and only waited for, if the raw answer fails. modelTier is
+    the question's tier whenever the rewrite was requested, else None.
+    """
+    nhtsa = asyncio.create_task(asyncio.to_thread(parse_and_validate_vehicles, user_input))
+    rewrite = None
+    tier = None
+    if not extract_vins(user_input) and not YEAR_MAKE_PATTERN.match(user_input):
+        rewrite = asyncio.create_task(_normalize_vehicle_with_llm(user_input, question))
+        tier = _tier(question)
+    
+    try:
+        vehicles, errors = await nhtsa
+        
+        if not vehicles and rewrite is not None:
+            try:
+                normalized = await rewrite
+            except Exception as e:
+                print(f"Vehicle rewrite failed: {e}")
+                normalized = None
+            
+            if normalized and normalized.lower() != user_input.strip().lower():
+                retry_vehicles, retry_errors = await asyncio.to_thread(parse_and_validate_vehicles, normalized)
+                if retry_vehicles:
+                    vehicles, errors = retry_vehicles, retry_errors
+        
+        return {**_vehicle_result(vehicles, errors), "modelTier": tier}
+    finally:
+        if rewrite is not None and not rewrite.done():
+            rewrite.cancel()
+
+
+async def _ask_llm(tier, system_prompt, user_input, question):
+    """
+    One structured-output call on the given tier. Returns the parsed verdict,
+    or None if the reply was a refusal or not valid JSON.
+    """
+    model = MODEL_TIERS[tier]
+    started = time.perf_counter()
+    response = await client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_input}
+        ],
+        temperature=0.2,
+        max_tokens=question.get('maxTokens', DEFAULT_MAX_TOKENS),
+        response_format=response_format(question),
+        timeout=TURN_DEADLINE_SECONDS
+    )
+    _count_call(tier, 'calls', (time.perf_counter() - started) * 1000)
+    
+    message = response.choices[0].message
+    
+    # The schema guarantees the shape; a safety refusal is the only other reply
+    if getattr(message, 'refusal', None):
+        _count_parse(model, 'refusals')
+        print(f"{model} refused to validate {question['id']}: {message.refusal}")
+        return None
+    
+    try:
+        result = json.loads(message.content)
+    except (TypeError, json.JSONDecodeError) as e:
+        # Usually a reply cut off at the question's maxTokens
+        _count_parse(model, 'parse_failures')
+        print(f"Error parsing {model} response: {e}")
+        print(f"Raw response: {message.content}")
+        return None
+    
+    result['extractedValue'] = _as_text(result['extractedValue'])
+    _count_parse(model, None)
+    return result
+
+
+async def validate_answer_async(user_input, question, context=None, max_retries=3, frustration_score=None):
     """
     Use OpenAI to validate user response and extract structured data
-    Also checks for frustration
+    Also checks for frustration (accumulating into frustration_score if given)
     Includes retry logic for API failures
     """
     
     # First check for frustration
-    is_frustrated, reason = check_for_frustration(user_input)
+    is_frustrated, reason = check_for_frustration(user_input, frustration_score)
     if is_frustrated:
         return {
             "isValid": False,
@@ -31,23 +379,22 @@ def validate_answer(user_input, question, context=None, max_retries=3):
         }
     
     # Special handling for vehicle_identifier - validate with NHTSA
+    # (several VINs in one message are decoded together and queued by the session)
     if question['id'] == 'vehicle_identifier':
-        is_valid, message = parse_and_validate_vehicle(user_input)
-        
-        if is_valid:
-            return {
-                "isValid": True,
-                "extractedValue": message,
-                "feedbackMessage": f"Great! I've verified your vehicle: {message}",
-                "nextAction": "accept"
-            }
-        else:
-            return {
-                "isValid": False,
-                "extractedValue": None,
-                "feedbackMessage": message,
-                "nextAction": "reask"
-            }
+        return await _validate_vehicle_async(user_input, question)
+    
+    # Clear-cut answers to simple questions are settled locally, without the LLM
+    local_result = validate_locally(user_input, question)
+    if local_result is not None:
+        return {**local_result, "modelTier": "local"}
+    
+    # Same answer to the same question -> same verdict, so reuse it (never for personal data)
+    cacheable = _cacheable(user_input, question)
+    if cacheable:
+        cache_key = _llm_cache_key(user_input, question)
+        cached = llm_cache.get('validation', cache_key)
+        if cached is not None:
+            return _cached_result({field: cached[field] for field in CACHED_VERDICT_FIELDS}, question)
     
     # For all other questions, use LLM validation
     context_info = ""
@@ -63,59 +410,41 @@ Validation rules: {question['validationRules']}{context_info}
 Your job:
 1. Check if the user's response is valid and matches the expected format
 2. Extract the actual answer from their response (handle natural language variations)
-3. Provide helpful feedback if invalid
+3. Provide helpful feedback if invalid (one short sentence), or a brief acknowledgement if valid
 4. Be FLEXIBLE with natural language
 
-Respond ONLY with valid JSON in this exact format:
-{{
-  "isValid": true/false,
-  "extractedValue": "the extracted answer" or null if invalid,
-  "feedbackMessage": "friendly message",
-  "nextAction": "accept" or "reask"
-}}
-
-Examples:
-- For zip code: "12345" or "I live in 12345" → {{"isValid": true, "extractedValue": "12345", "feedbackMessage": "Got it!", "nextAction": "accept"}}
-- For vehicle use: "I use it to commute" → {{"isValid": true, "extractedValue": "commuting", "feedbackMessage": "Thanks!", "nextAction": "accept"}}
-- For yes/no: "yeah" or "yep" → {{"isValid": true, "extractedValue": "yes", "feedbackMessage": "Great!", "nextAction": "accept"}}
-
-Be flexible with natural language but extract structured data.
+Examples: "I live in 12345" → 12345, "I use it to commute" → commuting, "yeah" → yes.
+Set extractedValue to null and nextAction to "reask" when the answer is invalid.
+Set confidence (0 to 1) to how sure you are of the verdict and the extracted value.
 """
     
     # Retry logic for API calls
     for attempt in range(max_retries):
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                temperature=0.2,
-                max_tokens=500,
-                timeout=30  # Add timeout
-            )
+            tier = _tier(question)
+            result = await _ask_llm(tier, system_prompt, user_input, question)
             
-            response_text = response.choices[0].message.content
+            # The small model handles the easy majority; anything it is unsure of goes up a tier
+            if tier != "large" and _needs_escalation(result):
+                _count_call(tier, 'escalated')
+                tier = "large"
+                result = await _ask_llm(tier, system_prompt, user_input, question)
             
-            # Handle markdown code blocks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
+            if result is None:
+                return {
+                    "isValid": False,
+                    "extractedValue": None,
+                    "feedbackMessage": question['retryPrompt'],
+                    "nextAction": "reask",
+                    "modelTier": tier
+                }
             
-            result = json.loads(response_text)
+            result['modelTier'] = tier
+            if cacheable:
+                verdict = {field: result[field] for field in CACHED_VERDICT_FIELDS}
+                llm_cache.set('validation', cache_key, verdict, LLM_CACHE_TTL)
             return result
             
-        except json.JSONDecodeError as e:
-            print(f"Error parsing LLM response: {e}")
-            print(f"Raw response: {response_text}")
-            return {
-                "isValid": False,
-                "extractedValue": None,
-                "feedbackMessage": "Sorry, I had trouble processing that. Could you try again?",
-                "nextAction": "reask"
-            }
         except Exception as e:
             error_message = str(e)
             print(f"API Error (attempt {attempt + 1}/{max_retries}): {e}")
@@ -132,7 +461,7 @@ Be flexible with natural language but extract structured data.
             # Check for rate limit errors
             if "rate limit" in error_message.lower() or "429" in error_message:
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
                     continue
                 return {
                     "isValid": False,
@@ -143,13 +472,8 @@ Be flexible with natural language but extract structured data.
             
             # Retry for other errors
             if attempt < max_retries - 1:
-                time.sleep(1)  # Wait 1 second before retry
+                await asyncio.sleep(1)  # Wait 1 second before retry
                 continue
             
             # Final attempt failed - return generic error
-            return {
-                "isValid": False,
-                "extractedValue": None,
-                "feedbackMessage": "I'm having trouble right now. Could you try again?",
-                "nextAction": "reask"
-            }
\ No newline at end of file
+            return dict(TROUBLE_RESULT)
\ No newline at end of file
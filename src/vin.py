@@ -0,0 +1,128 @@
+"""
+Local VIN checks (ISO 3779 / 49 CFR 565) that need no network:
+character set, check digit, model-year code and manufacturer (WMI) lookup.
+"""
+from datetime import datetime
+
+VIN_LENGTH = 17
+
+# I, O and Q are never used (too easily confused with 1 and 0)
+TRANSLITERATION = {
+    **{str(digit): digit for digit in range(10)},
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'P': 7, 'R': 9,
+    'S': 2, 'T': 3, 'U': 4, 'V': 5, 'W': 6, 'X': 7, 'Y': 8, 'Z': 9,
+}
+
+POSITION_WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
+
+# Position 10; the cycle repeats every 30 years (A = 1980 and 2010)
+YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+YEAR_CODE_BASE = 1980
+
+# World manufacturer identifiers (positions 1-3) for makes common in the US market
+WMI_MAKES = {
+    '1FA': 'FORD', '1FM': 'FORD', '1FT': 'FORD', '1FD': 'FORD', '2FA': 'FORD', '2FM': 'FORD',
+    '2FT': 'FORD', '3FA': 'FORD', '3FM': 'FORD', '3FT': 'FORD', 'WF0': 'FORD',
+    '1LN': 'LINCOLN', '2LM': 'LINCOLN', '5LM': 'LINCOLN', '1ME': 'MERCURY',
+    '1G1': 'CHEVROLET', '1GC': 'CHEVROLET', '1GN': 'CHEVROLET', '1GB': 'CHEVROLET',
+    '2G1': 'CHEVROLET', '2GN': 'CHEVROLET', '3G1': 'CHEVROLET', '3GC': 'CHEVROLET',
+    '3GN': 'CHEVROLET', 'KL7': 'CHEVROLET', 'KL8': 'CHEVROLET',
+    '1G4': 'BUICK', '2G4': 'BUICK', 'KL4': 'BUICK', '1G6': 'CADILLAC', '1GY': 'CADILLAC',
+    '1GT': 'GMC', '1GK': 'GMC', '2GT': 'GMC', '2GK': 'GMC', '3GT': 'GMC', '3GK': 'GMC',
+    '1C3': 'CHRYSLER', '2C3': 'CHRYSLER', '2C4': 'CHRYSLER', '1C4': 'JEEP', '1J4': 'JEEP',
+    '1J8': 'JEEP', '3C4': 'JEEP', 'ZAC': 'JEEP', '1B3': 'DODGE', '2B3': 'DODGE', '1D7': 'DODGE',
+    '2D3': 'DODGE', '3D7': 'DODGE', '1C6': 'RAM', '3C6': 'RAM', '3C7': 'RAM',
+    '1HG': 'HONDA', '2HG': 'HONDA', '2HK': 'HONDA', '3HG': 'HONDA', '5FN': 'HONDA', '5J6': 'HONDA',
+    '19X': 'HONDA', 'JHM': 'HONDA', 'JHL': 'HONDA', '19U': 'ACURA', 'JH4': 'ACURA', '5J8': 'ACURA',
+    '4T1': 'TOYOTA', '4T3': 'TOYOTA', '4T4': 'TOYOTA', '5TD': 'TOYOTA', '5TF': 'TOYOTA',
+    '5TE': 'TOYOTA', '2T1': 'TOYOTA', '2T3': 'TOYOTA', '3TM': 'TOYOTA', 'JTD': 'TOYOTA',
+    'JTE': 'TOYOTA', 'JTM': 'TOYOTA', 'JTN': 'TOYOTA', 'JTK': 'TOYOTA', 'JT2': 'TOYOTA',
+    'JTH': 'LEXUS', 'JTJ': 'LEXUS', '2T2': 'LEXUS', '58A': 'LEXUS',
+    '1N4': 'NISSAN', '1N6': 'NISSAN', '3N1': 'NISSAN', '3N6': 'NISSAN', '5N1': 'NISSAN',
+    'JN1': 'NISSAN', 'JN8': 'NISSAN', 'JNK': 'INFINITI', '5N3': 'INFINITI',
+    '4S3': 'SUBARU', '4S4': 'SUBARU', 'JF1': 'SUBARU', 'JF2': 'SUBARU',
+    'JM1': 'MAZDA', 'JM3': 'MAZDA', '3MZ': 'MAZDA', 'JA3': 'MITSUBISHI', 'JA4': 'MITSUBISHI',
+    'KMH': 'HYUNDAI', 'KM8': 'HYUNDAI', '5NP': 'HYUNDAI', '5NM': 'HYUNDAI',
+    'KNA': 'KIA', 'KND': 'KIA', '5XX': 'KIA', '5XY': 'KIA', 'KMU': 'GENESIS',
+    '5YJ': 'TESLA', '7SA': 'TESLA', '7G2': 'TESLA',
+    'WBA': 'BMW', 'WBS': 'BMW', 'WBY': 'BMW', '5UX': 'BMW', '5UJ': 'BMW', 'WMW': 'MINI',
+    'WAU': 'AUDI', 'WA1': 'AUDI', 'WUA': 'AUDI',
+    'WDB': 'MERCEDES-BENZ', 'WDC': 'MERCEDES-BENZ', 'WDD': 'MERCEDES-BENZ',
+    'W1K': 'MERCEDES-BENZ', 'W1N': 'MERCEDES-BENZ', '4JG': 'MERCEDES-BENZ', '55S': 'MERCEDES-BENZ',
+    'WVW': 'VOLKSWAGEN', 'WVG': 'VOLKSWAGEN', '1VW': 'VOLKSWAGEN', '3VW': 'VOLKSWAGEN',
+    '1V2': 'VOLKSWAGEN', 'WP0': 'PORSCHE', 'WP1': 'PORSCHE',
+    'YV1': 'VOLVO', 'YV4': 'VOLVO', '7JR': 'VOLVO', 'LYV': 'VOLVO',
+    'SAL': 'LAND ROVER', 'SAJ': 'JAGUAR', 'SCA': 'ROLLS-ROYCE', 'SCB': 'BENTLEY',
+    'ZFF': 'FERRARI', 'ZHW': 'LAMBORGHINI', 'ZAR': 'ALFA ROMEO', 'ZFA': 'FIAT', '3C3': 'FIAT',
+    'ZAM': 'MASERATI', 'SCF': 'ASTON MARTIN',
+}
+
+
+def clean_vin(text):
+    """Uppercase and drop spaces and hyphens"""
+    return text.strip().upper().replace('-', '').replace(' ', '')
+
+
+def check_digit(vin):
+    """The expected position-9 check digit ('0'-'9' or 'X')"""
+    total = sum(TRANSLITERATION[char] * weight for char, weight in zip(vin, POSITION_WEIGHTS))
+    remainder = total % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def validate_vin(vin):
+    """
+    Structural VIN check with no network.
+    Returns: (is_valid, error_message_or_None)
+    """
+    if len(vin) != VIN_LENGTH:
+        return False, f"A VIN has 17 characters; that one has {len(vin)}."
+
+    bad_chars = sorted({char for char in vin if char not in TRANSLITERATION})
+    if bad_chars:
+        if set(bad_chars) <= set("IOQ"):
+            return False, f"VINs never contain the letters I, O or Q (found {', '.join(bad_chars)}). Please double-check it - they are often 1 or 0."
+        return False, "A VIN can only contain letters and numbers. Please double-check it."
+
+    if vin[8] != check_digit(vin):
+        return False, "That VIN doesn't pass its check digit, so there's probably a typo. Please double-check it."
+
+    if vin[9] not in YEAR_CODES:
+        return False, "That VIN doesn't have a valid model-year character. Please double-check it."
+
+    return True, None
+
+
+def model_year(vin, today=None):
+    """
+    Model year from position 10. 49 CFR 565 applies to every vehicle sold in
+    the US, wherever it was built: position 7 picks the 30-year cycle
+    (digit: 1980-2009, letter: 2010-2039). If that would put the year in the
+    future, position 7 can't be following the rule, and the latest year that
+    is not in the future is used instead.
+    """
+    code = vin[9]
+    if code not in YEAR_CODES:
+        return None
+
+    year = YEAR_CODE_BASE + YEAR_CODES.index(code)
+    latest = (today or datetime.now()).year + 1
+
+    if vin[6].isdigit():
+        return year
+    return year + 30 if year + 30 <= latest else year
+
+
+def manufacturer(vin):
+    """Make from the bundled WMI table, or None if unknown"""
+    return WMI_MAKES.get(vin[:3])
+
+
+def predecode(vin):
+    """Offline "year make" for a structurally valid VIN, or None if the make is unknown"""
+    make = manufacturer(vin)
+    year = model_year(vin)
+    if not make or not year:
+        return None
+    return f"{year} {make}"
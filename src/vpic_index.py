@@ -0,0 +1,281 @@
+"""
+Offline year -> make -> models index built from a vPIC snapshot.
+
+Usage:
+    python -m src.vpic_index --years 2000-2026 --output data/vpic_snapshot.json.gz
+    python -m src.vpic_index --from-csv vpic_models.csv --output data/vpic_snapshot.json.gz
+
+The snapshot is JSON (optionally gzipped) of the form
+{"2020": {"HONDA": ["Accord", "Civic", ...], ...}, ...}. It is either
+fetched from GetModelsForMakeYear for every make vPIC lists for passenger
+cars, trucks and MPVs (or a --makes list), or converted from a CSV with
+Model_Year, Make_Name and Model_Name columns (e.g. a table export of the
+standalone vPIC database). Makes missing from the snapshot are still
+checked against the live API.
+"""
+import argparse
+import csv
+import difflib
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+import requests
+
+DEFAULT_SNAPSHOT = "data/vpic_snapshot.json.gz"
+
+# What people type (normalized) -> vPIC make name
+MAKE_ALIASES = {
+    'chevy': 'chevrolet',
+    'vw': 'volkswagen',
+    'volkswagon': 'volkswagen',
+    'merc': 'mercedes-benz',
+    'mercedes': 'mercedes-benz',
+    'mercedes benz': 'mercedes-benz',
+    'benz': 'mercedes-benz',
+    'mb': 'mercedes-benz',
+    'beemer': 'bmw',
+    'bimmer': 'bmw',
+    'caddy': 'cadillac',
+    'lambo': 'lamborghini',
+    'landrover': 'land rover',
+    'alfa': 'alfa romeo',
+    'rolls': 'rolls-royce',
+    'rolls royce': 'rolls-royce',
+    'aston': 'aston martin',
+    'infinity': 'infiniti',
+    'hyundia': 'hyundai',
+    'toyta': 'toyota',
+}
+
+# Multi-word makes recognised even without a snapshot loaded
+MULTI_WORD_MAKES = {'land rover', 'alfa romeo', 'aston martin', 'rolls royce', 'mercedes benz', 'mercedes amg'}
+
+# Longest make (in words) tried when splitting "make model" input
+MAX_MAKE_WORDS = 3
+
+# vPIC vehicle types whose makes the snapshot builder fetches when --makes is not given
+VEHICLE_TYPES = ['car', 'truck', 'multipurpose passenger vehicle (mpv)']
+
+MODEL_MATCH_CUTOFF = 0.75
+
+
+def normalize(text):
+    """Lowercase, treat hyphens/underscores as spaces and collapse whitespace"""
+    return " ".join(re.sub(r"[-_/.]", " ", text.lower()).split())
+
+
+def _squash(text):
+    """Normalized form without spaces, so "crv" matches "CR-V" """
+    return normalize(text).replace(" ", "")
+
+
+def _alias(text):
+    make = normalize(text)
+    return MAKE_ALIASES.get(make) or MAKE_ALIASES.get(make.replace(" ", ""))
+
+
+def canonical_make(text):
+    """Normalized make with aliases resolved ("Chevy" -> "chevrolet")"""
+    alias = _alias(text)
+    return normalize(alias) if alias else normalize(text)
+
+
+def api_make_name(text):
+    """Make to send to the vPIC API ("vw" -> "volkswagen", others unchanged)"""
+    return _alias(text) or text.strip()
+
+
+def match_model(model, candidates):
+    """
+    Best vPIC model name for what the user typed, or None.
+    Tries exact, space-insensitive, substring, then difflib close matches.
+    """
+    wanted = normalize(model)
+    squashed = wanted.replace(" ", "")
+    if not wanted:
+        return None
+
+    by_squash = {}
+    for name in candidates:
+        by_squash.setdefault(_squash(name), name)
+
+    if squashed in by_squash:
+        return by_squash[squashed]
+
+    # Substring, preferring the shortest name ("civ" -> "Civic" before "Civic Type R")
+    contained = [name for key, name in by_squash.items() if squashed in key]
+    if contained:
+        return min(contained, key=len)
+
+    close = difflib.get_close_matches(squashed, list(by_squash), n=1, cutoff=MODEL_MATCH_CUTOFF)
+    return by_squash[close[0]] if close else None
+
+
+def split_make_model(words, known_makes=()):
+    """
+    Split the words after the year into (make, model), preferring the longest
+    prefix that is a known make or alias ("land rover defender" -> "land rover").
+    """
+    for size in range(min(MAX_MAKE_WORDS, len(words)), 0, -1):
+        candidate = " ".join(words[:size])
+        make = canonical_make(candidate)
+        if size == 1 or make in known_makes or make in MULTI_WORD_MAKES or _alias(candidate):
+            model = " ".join(words[size:]) or None
+            return candidate, model
+    return None, None
+
+
+class VpicIndex:
+    """Year -> make -> models lookup over a vPIC snapshot, held in memory"""
+
+    def __init__(self, snapshot):
+        # {year: {normalized make: (vPIC make name, [model names])}}
+        self._years = {}
+        self.makes = set()
+
+        for year, makes in snapshot.items():
+            by_make = {}
+            for make_name, models in makes.items():
+                by_make[normalize(make_name)] = (make_name, sorted(set(models)))
+            self._years[int(year)] = by_make
+            self.makes.update(by_make)
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def has_year(self, year):
+        return int(year) in self._years
+
+    def find_make(self, year, make):
+        """(vPIC make name, models) for this year, or None if the make is unknown"""
+        return self._years.get(int(year), {}).get(canonical_make(make))
+
+    def suggest_makes(self, year, make, n=3):
+        """Close make names for a typo'd make"""
+        by_make = self._years.get(int(year), {})
+        close = difflib.get_close_matches(canonical_make(make), list(by_make), n=n, cutoff=0.6)
+        return [by_make[key][0] for key in close]
+
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    The process-wide index loaded from VPIC_SNAPSHOT (default
+    data/vpic_snapshot.json.gz), or None if no snapshot is available.
+    """
+    global _index, _index_loaded
+
+    if _index_loaded:
+        return _index
+
+    with _index_lock:
+        if not _index_loaded:
+            path = Path(os.getenv("VPIC_SNAPSHOT", DEFAULT_SNAPSHOT))
+            if path.exists():
+                try:
+                    _index = VpicIndex.load(path)
+                except Exception as e:
+                    print(f"Could not load vPIC snapshot {path}: {e}")
+            _index_loaded = True
+
+    return _index
+
+
+def fetch_all_makes(vehicle_types=VEHICLE_TYPES):
+    """Every make vPIC lists for the given vehicle types (GetMakesForVehicleType)"""
+    session = requests.Session()
+    makes = set()
+
+    for vehicle_type in vehicle_types:
+        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/GetMakesForVehicleType/{vehicle_type}?format=json"
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        makes.update(row['MakeName'].strip() for row in response.json().get('Results', []) if row.get('MakeName'))
+
+    print(f"Found {len(makes)} makes", file=sys.stderr)
+    return sorted(makes)
+
+
+def fetch_snapshot(makes, years, delay=0.2):
+    """Download model lists for every make/year pair (one request each, paced)"""
+    snapshot = {}
+    session = requests.Session()
+
+    for year in years:
+        for make in makes:
+            # Some vPIC make names contain "/" or "&"
+            url = f"https://vpic.nhtsa.dot.gov/api/vehicles/GetModelsForMakeYear/make/{quote(make, safe='')}/modelyear/{year}?format=json"
+            response = session.get(url, timeout=30)
+            response.raise_for_status()
+
+            for row in response.json().get('Results', []):
+                models = snapshot.setdefault(str(year), {}).setdefault(row['Make_Name'], [])
+                models.append(row['Model_Name'])
+            time.sleep(delay)
+
+        print(f"Fetched {year}", file=sys.stderr)
+
+    return snapshot
+
+
+def read_csv_snapshot(path):
+    """Build a snapshot from rows with Model_Year, Make_Name and Model_Name columns"""
+    snapshot = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            models = snapshot.setdefault(str(int(row['Model_Year'])), {}).setdefault(row['Make_Name'], [])
+            models.append(row['Model_Name'])
+    return snapshot
+
+
+def parse_years(text):
+    """Parse "2000-2026" or "2019,2020" """
+    if "-" in text:
+        start, end = text.split("-")
+        return list(range(int(start), int(end) + 1))
+    return [int(year) for year in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an offline vPIC make/model snapshot")
+    parser.add_argument("--output", default=DEFAULT_SNAPSHOT)
+    parser.add_argument("--years", default="2000-2026", help="Year range (e.g. 2000-2026) or list")
+    parser.add_argument("--makes", help="Comma-separated makes (default: every vPIC car, truck and MPV make)")
+    parser.add_argument("--from-csv", help="Convert a CSV export instead of calling the API")
+    args = parser.parse_args(argv)
+
+    if args.from_csv:
+        snapshot = read_csv_snapshot(args.from_csv)
+    else:
+        makes = args.makes.split(",") if args.makes else fetch_all_makes()
+        snapshot = fetch_snapshot(makes, parse_years(args.years))
+
+    snapshot = {year: {make: sorted(set(models)) for make, models in makes.items()}
+                for year, makes in snapshot.items()}
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    opener = gzip.open if args.output.endswith(".gz") else open
+    with opener(output, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"), sort_keys=True)
+
+    models = sum(len(names) for makes in snapshot.values() for names in makes.values())
+    print(f"Wrote {len(snapshot)} years, {models} models to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import queue
+import threading
+
+# Defaults for the background writer
+MAX_QUEUE = 10000
+MAX_BATCH = 500
+LINGER_SECONDS = 0.02
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Background writer that drains queued write operations in batches.
+    Operations are handed to apply_batch(ops) on the writer thread, so each
+    batch is one transaction no matter how many sessions produced it.
+    apply_batch is responsible for retrying or dropping operations that fail.
+    """
+
+    def __init__(self, apply_batch, max_queue=MAX_QUEUE, max_batch=MAX_BATCH, linger=LINGER_SECONDS):
+        self.apply_batch = apply_batch
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+                self._thread.start()
+
+    def submit(self, op):
+        """Queue an operation (blocks when the queue is full)"""
+        self._queue.put(op)
+
+    def flush(self, timeout=None):
+        """
+        Wait until every operation submitted before this call is written.
+        Returns False if the timeout expired first.
+        """
+        if not self.running:
+            return True
+
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout=None):
+        """Drain the queue and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+            thread.join(timeout)
+            self._thread = None
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+
+        while len(batch) < self.max_batch and batch[-1] is not _STOP:
+            try:
+                batch.append(self._queue.get(timeout=self.linger))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+
+            ops = [item for item in batch if not isinstance(item, threading.Event) and item is not _STOP]
+            if ops:
+                self._write(ops)
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+            if batch[-1] is _STOP:
+                return
+
+    def _write(self, ops):
+        # apply_batch isolates failing operations itself; anything escaping
+        # here is unexpected and must not kill the writer thread
+        try:
+            self.apply_batch(ops)
+        except Exception as e:
+            print(f"Write-behind batch failed ({len(ops)} ops): {e}")